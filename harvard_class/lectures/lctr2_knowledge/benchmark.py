@@ -0,0 +1,172 @@
+import io
+import os
+import time
+
+import clue
+import mastermind
+import puzzle
+from logic import *
+
+PUZZLES = [
+    ("clue", clue.knowledge, clue.symbols),
+    ("mastermind", mastermind.knowledge, mastermind.symbols),
+    ("puzzle", puzzle.knowledge, puzzle.symbols)
+]
+
+
+def card_groups(n):
+    """
+    Returns a knowledge base of `n` independent Clue-style groups, each
+    saying at least one of three cards is held, but not both of the first
+    two; it has 5 ** n models.
+    """
+    knowledge = And()
+    for group in range(n):
+        a, b, c = [Symbol(f"{card}{group}") for card in "abc"]
+        knowledge.add(Or(a, b, c))
+        knowledge.add(Or(Not(a), Not(b)))
+    return knowledge
+
+
+def assignment(n):
+    """
+    Returns a knowledge base saying each of `n` people belongs to exactly
+    one of `n` houses, with one person per house, as in puzzle.py.
+    """
+    knowledge = And()
+    for person in range(n):
+        knowledge.add(Or(*[Symbol(f"p{person}h{house}")
+                           for house in range(n)]))
+    for i in range(n):
+        for j in range(n):
+            for k in range(n):
+                if j != k:
+                    knowledge.add(Implication(Symbol(f"p{i}h{j}"),
+                                              Not(Symbol(f"p{i}h{k}"))))
+                    knowledge.add(Implication(Symbol(f"p{j}h{i}"),
+                                              Not(Symbol(f"p{k}h{i}"))))
+    return knowledge
+
+
+def nested(depth):
+    """Returns a knowledge base of one sentence nested `depth` levels deep."""
+    sentence = Symbol("p0")
+    for i in range(1, depth):
+        sentence = Implication(Symbol(f"p{i}"), Not(Or(sentence,
+                                                      Symbol(f"q{i}"))))
+    return And(sentence)
+
+
+def round_trip(knowledge):
+    """Writes a knowledge base to text and reads it back."""
+    file = io.StringIO()
+    dump(knowledge, file)
+    file.seek(0)
+    return load(file), len(file.getvalue())
+
+
+def enumerate_count(knowledge):
+    """Counts models by enumerating each one."""
+    return sum(1 for _ in satisfying_models(knowledge))
+
+
+def per_query(knowledge, symbols):
+    """Classifies each symbol with separate calls to `model_check`."""
+    entailed, refuted, unknown = [], [], []
+    for symbol in symbols:
+        if model_check(knowledge, symbol):
+            entailed.append(symbol)
+        elif model_check(knowledge, Not(symbol)):
+            refuted.append(symbol)
+        else:
+            unknown.append(symbol)
+    return entailed, refuted, unknown
+
+
+def replay(knowledge, symbols, compiled):
+    """
+    Adds the conjuncts of a knowledge base one at a time, classifying
+    every symbol after each one, either by re-solving from scratch or
+    with a compiled knowledge base that is updated incrementally.
+    """
+    growing = And()
+    if compiled:
+        growing = CompiledKnowledge(growing)
+    results = []
+    for conjunct in knowledge.conjuncts:
+        (growing.knowledge if compiled else growing).add(conjunct)
+        results.append(entailed_symbols(growing, symbols))
+    return results
+
+
+def timed(function, *args):
+    """Returns the result of calling `function` and the seconds it took."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    print(f"{'puzzle':<12}{'symbols':>8}{'model_check':>14}"
+          f"{'entailed_symbols':>18}{'speedup':>9}")
+    for name, knowledge, symbols in PUZZLES:
+        expected, slow = timed(per_query, knowledge, symbols)
+        result, fast = timed(entailed_symbols, knowledge, symbols)
+        if result != expected:
+            raise Exception(f"{name}: results differ")
+        print(f"{name:<12}{len(symbols):>8}{slow:>13.3f}s"
+              f"{fast:>17.3f}s{slow / fast:>8.1f}x")
+
+    print()
+    print(f"{'knowledge':<16}{'models':>12}{'enumerate':>12}"
+          f"{'count_models':>14}")
+    bases = [(name, knowledge) for name, knowledge, _ in PUZZLES]
+    bases += [(f"card_groups({n})", card_groups(n)) for n in (4, 6, 50)]
+    for name, knowledge in bases:
+        count, fast = timed(count_models, knowledge)
+        if len(knowledge.symbols()) <= 18:
+            expected, slow = timed(enumerate_count, knowledge)
+            if count != expected:
+                raise Exception(f"{name}: counts differ")
+            slow = f"{slow:.3f}s"
+        else:
+            slow = "-"
+        print(f"{name:<16}{count:>12.4g}{slow:>12}{fast:>13.3f}s")
+
+    print()
+    print(f"{'puzzle':<12}{'queries':>8}{'re-solve':>11}{'compiled':>11}")
+    for name, knowledge, symbols in PUZZLES:
+        expected, slow = timed(replay, knowledge, symbols, False)
+        result, fast = timed(replay, knowledge, symbols, True)
+        if result != expected:
+            raise Exception(f"{name}: results differ")
+        queries = len(knowledge.conjuncts) * len(symbols)
+        print(f"{name:<12}{queries:>8}{slow:>10.3f}s{fast:>10.3f}s")
+
+    print()
+    print(f"{'knowledge':<20}{'bytes':>10}{'formula':>10}{'round trip':>12}")
+    bases = [("card_groups(20000)", card_groups(20000)),
+             ("nested(5000)", nested(5000))]
+    for name, knowledge in bases:
+        _, written = timed(knowledge.formula)
+        (result, size), loaded = timed(round_trip, knowledge)
+        if result.formula() != knowledge.formula():
+            raise Exception(f"{name}: round trip differs")
+        print(f"{name:<20}{size:>10}{written:>9.3f}s{loaded:>11.3f}s")
+
+    print()
+    print(f"parallel model checking ({os.cpu_count()} CPUs)")
+    print(f"{'knowledge':<16}{'entailed':>9}{'serial':>10}{'parallel':>10}")
+    for n in (5, 6):
+        knowledge = assignment(n)
+        query = Or(*[Symbol(f"p0h{house}") for house in range(n)])
+        expected, slow = timed(model_check, knowledge, query)
+        result, fast = timed(parallel_model_check, knowledge, query)
+        if result != expected:
+            raise Exception(f"assignment({n}): results differ")
+        print(f"{f'assignment({n})':<16}{str(result):>9}"
+              f"{slow:>9.3f}s{fast:>9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,11 +21,13 @@ symbols = characters + rooms + weapons
 
 
 def check_knowledge(knowledge):
+    entailed, _, unknown = entailed_symbols(knowledge, symbols)
     for symbol in symbols:
-        if model_check(knowledge, symbol):
+        if symbol in entailed:
             termcolor.cprint(f"{symbol}: YES", "green")
-        elif not model_check(knowledge, Not(symbol)):
-            print(f"{symbol}: MAYBE")
+        elif symbol in unknown:
+            print(f"{symbol}: MAYBE "
+                  f"({probability(knowledge, symbol):.0%})")
 
 
 # There must be a person, room, and weapon.
@@ -49,4 +51,10 @@ knowledge.add(Or(
 knowledge.add(Not(plum))
 knowledge.add(Not(ballroom))
 
-check_knowledge(knowledge)
+
+def main():
+    check_knowledge(knowledge)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 import itertools
+import multiprocessing
+import os
+from collections import Counter
 
 
 class Sentence():
@@ -7,19 +10,62 @@ class Sentence():
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may not assign every
+        symbol. Returns True or False if the value is already determined,
+        or None if it depends on the unassigned symbols.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
-        return ""
+        fragments = []
+        stack = [self]
+        while stack:
+            part = stack.pop()
+            if isinstance(part, Sentence):
+                stack.extend(reversed(part.formula_parts()))
+            else:
+                fragments.append(part)
+        return "".join(fragments)
+
+    def formula_parts(self):
+        """
+        Returns the pieces of the sentence's formula, as a list of strings
+        and of subsentences whose formulas go in their place.
+        """
+        return []
+
+    def bare(self):
+        """Checks if the formula needs no parentheses around it."""
+        return True
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def occurrences(self):
+        """Returns a Counter of how often each symbol occurs in the sentence."""
+        return Counter()
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
 
+    @classmethod
+    def parenthesized(cls, sentence):
+        """
+        Returns the formula parts for a sentence, parenthesized if not
+        already parenthesized. Equivalent to `parenthesize`, but decides
+        from the sentence's structure instead of rescanning its formula,
+        so that building a whole formula takes linear time.
+        """
+        if sentence.bare():
+            return [sentence]
+        return ["(", sentence, ")"]
+
     @classmethod
     def parenthesize(cls, s):
         """Parenthesizes an expression if not already parenthesized."""
@@ -62,12 +108,22 @@ class Symbol(Sentence):
         except KeyError:
             raise EvaluationException(f"variable {self.name} not in model")
 
-    def formula(self):
-        return self.name
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
+    def formula_parts(self):
+        return [self.name]
+
+    def bare(self):
+        return Sentence.parenthesize(self.name) == self.name
 
     def symbols(self):
         return {self.name}
 
+    def occurrences(self):
+        return Counter({self.name: 1})
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -86,12 +142,22 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
-    def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
+    def formula_parts(self):
+        return ["¬"] + Sentence.parenthesized(self.operand)
+
+    def bare(self):
+        return False
 
     def symbols(self):
         return self.operand.symbols()
 
+    def occurrences(self):
+        return self.operand.occurrences()
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -120,15 +186,40 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
+    def formula_parts(self):
+        if len(self.conjuncts) == 1:
+            return [self.conjuncts[0]]
+        parts = []
+        for i, conjunct in enumerate(self.conjuncts):
+            if i > 0:
+                parts.append(" ∧ ")
+            parts.extend(Sentence.parenthesized(conjunct))
+        return parts
+
+    def bare(self):
         if len(self.conjuncts) == 1:
-            return self.conjuncts[0].formula()
-        return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
-                           for conjunct in self.conjuncts])
+            return self.conjuncts[0].bare()
+        return not self.conjuncts
 
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def occurrences(self):
+        counts = Counter()
+        for conjunct in self.conjuncts:
+            counts.update(conjunct.occurrences())
+        return counts
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -151,15 +242,40 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
+    def formula_parts(self):
         if len(self.disjuncts) == 1:
-            return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
+            return [self.disjuncts[0]]
+        parts = []
+        for i, disjunct in enumerate(self.disjuncts):
+            if i > 0:
+                parts.append(" ∨  ")
+            parts.extend(Sentence.parenthesized(disjunct))
+        return parts
+
+    def bare(self):
+        if len(self.disjuncts) == 1:
+            return self.disjuncts[0].bare()
+        return not self.disjuncts
 
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def occurrences(self):
+        counts = Counter()
+        for disjunct in self.disjuncts:
+            counts.update(disjunct.occurrences())
+        return counts
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -183,14 +299,30 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
-    def formula(self):
-        antecedent = Sentence.parenthesize(self.antecedent.formula())
-        consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
+    def formula_parts(self):
+        return (Sentence.parenthesized(self.antecedent) + [" => "]
+                + Sentence.parenthesized(self.consequent))
+
+    def bare(self):
+        return False
 
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def occurrences(self):
+        return self.antecedent.occurrences() + self.consequent.occurrences()
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -216,21 +348,51 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
-    def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
+    def formula_parts(self):
+        return (Sentence.parenthesized(self.left) + [" <=> "]
+                + Sentence.parenthesized(self.right))
+
+    def bare(self):
+        return False
 
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def occurrences(self):
+        return self.left.occurrences() + self.right.occurrences()
+
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
+    if isinstance(knowledge, CompiledKnowledge):
+        return knowledge.entails(query)
+
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
+        # If knowledge base is already false in the partial model, no
+        # extension of the model can be a counter-example
+        known = knowledge.evaluate_partial(model)
+        if known is False:
+            return True
+
+        # If knowledge base is already true, query must also be true
+        # in every extension of the model
+        if known is True:
+            value = query.evaluate_partial(model)
+            if value is not None:
+                return value
+
         # If model has an assignment for each symbol
         if not symbols:
 
@@ -240,9 +402,8 @@ def model_check(knowledge, query):
             return True
         else:
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+            # Choose the most frequently occurring remaining symbol
+            p, remaining = symbols[0], symbols[1:]
 
             # Create a model where the symbol is true
             model_true = model.copy()
@@ -258,7 +419,698 @@ def model_check(knowledge, query):
 
     # STARTING POINT
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = order_symbols(knowledge, query)
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def parallel_model_check(knowledge, query, split=None, processes=None):
+    """
+    Checks if knowledge base entails query, using several processes.
+
+    The `split` most frequently occurring symbols are fixed to each of
+    their 2 ** split assignments, and each resulting subproblem is checked
+    with `model_check` in a pool of `processes` worker processes (by
+    default, one per CPU, with a few subproblems per worker). As soon as
+    any subproblem has a model where the knowledge base is true but the
+    query is false, the remaining workers are stopped.
+    """
+    if isinstance(knowledge, CompiledKnowledge):
+        return knowledge.entails(query)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    symbols = order_symbols(knowledge, query)
+    if split is None:
+        split = (4 * processes - 1).bit_length()
+    split = min(split, len(symbols))
+
+    # Conjoin each assignment of the split symbols to the knowledge base
+    subproblems = []
+    for values in itertools.product([True, False], repeat=split):
+        assignment = [Symbol(symbol) if value else Not(Symbol(symbol))
+                      for symbol, value in zip(symbols, values)]
+        subproblems.append((And(knowledge, *assignment), query))
+
+    # Leaving the pool early terminates any workers still running
+    with multiprocessing.Pool(processes) as pool:
+        for entailed in pool.imap_unordered(check_subproblem, subproblems):
+            if not entailed:
+                return False
+    return True
+
+
+def check_subproblem(subproblem):
+    """Checks one (knowledge, query) pair for `parallel_model_check`."""
+    knowledge, query = subproblem
+    return model_check(knowledge, query)
+
+
+def entailed_symbols(knowledge, queries):
+    """
+    Checks many queries against a knowledge base in one pass.
+
+    Every model of the knowledge base is enumerated only once, instead of
+    once per query as repeated calls to `model_check` would do. Returns a
+    tuple of three lists (entailed, refuted, unknown): the queries that are
+    true in every model of the knowledge base, the queries that are false
+    in every model, and the queries that are true in some and false in
+    others.
+    """
+    queries = list(queries)
+    if isinstance(knowledge, CompiledKnowledge):
+        entailed, refuted, unknown = [], [], []
+        for query in queries:
+            if knowledge.entails(query):
+                entailed.append(query)
+            elif knowledge.entails(Not(query)):
+                refuted.append(query)
+            else:
+                unknown.append(query)
+        return entailed, refuted, unknown
+
+    # Whether each query has been seen true, or false, in some model
+    seen_true = [False] * len(queries)
+    seen_false = [False] * len(queries)
+    undecided = set(range(len(queries)))
+
+    symbols = order_symbols(knowledge, *queries)
+    for model in satisfying_models(knowledge, symbols):
+        for i in list(undecided):
+            if queries[i].evaluate(model):
+                seen_true[i] = True
+            else:
+                seen_false[i] = True
+            if seen_true[i] and seen_false[i]:
+                undecided.remove(i)
+
+        # Stop as soon as no query can still be entailed or refuted
+        if not undecided:
+            break
+
+    entailed, refuted, unknown = [], [], []
+    for i, query in enumerate(queries):
+        if not seen_false[i]:
+            entailed.append(query)
+        elif not seen_true[i]:
+            refuted.append(query)
+        else:
+            unknown.append(query)
+    return entailed, refuted, unknown
+
+
+def satisfying_models(knowledge, symbols=None):
+    """
+    Yields every model over `symbols` in which the knowledge base is true.
+
+    If `symbols` is None, the symbols of the knowledge base are used.
+    """
+
+    def enumerate_all(knowledge, symbols, model):
+        """Yields the extensions of a particular model that satisfy the KB."""
+
+        # Skip every extension of a partial model that falsifies the KB
+        if knowledge.evaluate_partial(model) is False:
+            return
+
+        # If model has an assignment for each symbol
+        if not symbols:
+            yield model
+        else:
+
+            # Choose the most frequently occurring remaining symbol
+            p, remaining = symbols[0], symbols[1:]
+
+            # Enumerate the models where the symbol is true, then false
+            for value in (True, False):
+                extended = model.copy()
+                extended[p] = value
+                yield from enumerate_all(knowledge, remaining, extended)
+
+    symbols = order_symbols(knowledge, symbols=symbols)
+    yield from enumerate_all(knowledge, symbols, dict())
+
+
+def order_symbols(*sentences, symbols=None):
+    """
+    Returns the symbols of the given sentences as a list, ordered from
+    most to least frequently occurring, so that branching on them first
+    lets partial evaluation settle the sentences as early as possible.
+
+    If `symbols` is given, only those symbols are ordered.
+    """
+    counts = Counter()
+    for sentence in sentences:
+        counts.update(sentence.occurrences())
+    if symbols is None:
+        symbols = counts.keys()
+    return sorted(symbols, key=lambda symbol: (-counts[symbol], symbol))
+
+
+def count_models(knowledge, evidence=None):
+    """
+    Counts the models in which the knowledge base (and the evidence,
+    if any) is true, over all symbols of the knowledge base and evidence.
+
+    The sentence is converted to conjunctive normal form, then counted by
+    splitting on symbols; whenever the remaining clauses fall apart into
+    groups that share no symbols, each group is counted independently and
+    its count is cached, so that repeated sub-problems are only solved once.
+    """
+    if evidence is not None:
+        knowledge = And(knowledge, evidence)
+    cnf = CNF(knowledge)
+    clauses = [frozenset(clause) for clause in cnf.clauses]
+    if not all(clauses):
+        return 0
+    return count_clauses(clauses, set(cnf.variables.values()), dict())
+
+
+def probability(knowledge, query):
+    """
+    Returns the probability that the query is true, given that the
+    knowledge base is true and all of its models are equally likely.
+    """
+    # Tautology over the query's symbols, so both counts share one domain
+    total = count_models(knowledge, Or(query, Not(query)))
+    if total == 0:
+        raise Exception("knowledge base has no models")
+    return count_models(knowledge, query) / total
+
+
+class CNF():
+    """
+    Conjunctive normal form of a logical sentence.
+
+    Clauses are lists of nonzero integers: `i` stands for the `i`th
+    variable and `-i` for its negation. Each symbol of the sentence gets
+    a variable, listed in `variables`. Compound subsentences get an extra
+    variable that is defined to be equivalent to them, so the clauses
+    have exactly one model for every model of the original sentence.
+    """
+
+    def __init__(self, sentence):
+        self.variables = dict()
+        self.clauses = []
+        self.definitions = dict()
+        self.count = 0
+        self.assert_true(sentence)
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def assert_true(self, sentence):
+        """Adds clauses requiring `sentence` to be true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.assert_true(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly when `sentence` is."""
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.variables:
+                self.variables[sentence.name] = self.new_variable()
+            return self.variables[sentence.name]
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        # Define a new variable x to be equivalent to the sentence
+        x = self.new_variable()
+        if isinstance(sentence, And):
+            literals = [self.literal(c) for c in sentence.conjuncts]
+            self.clauses.extend([-x, literal] for literal in literals)
+            self.clauses.append([x] + [-literal for literal in literals])
+        elif isinstance(sentence, Or):
+            literals = [self.literal(d) for d in sentence.disjuncts]
+            self.clauses.extend([x, -literal] for literal in literals)
+            self.clauses.append([-x] + literals)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            c = self.literal(sentence.consequent)
+            self.clauses.extend([[-x, -a, c], [x, a], [x, -c]])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            self.clauses.extend([[-x, -a, b], [-x, a, -b],
+                                 [x, a, b], [x, -a, -b]])
+        else:
+            raise TypeError("must be a logical sentence")
+        self.definitions[sentence] = x
+        return x
+
+
+def count_clauses(clauses, symbols, cache):
+    """
+    Counts the assignments to `symbols` under which all `clauses` hold.
+
+    `clauses` is a list of frozensets of literals, and `symbols` is the set
+    of variables being counted; any other variables in the clauses are
+    definitions that are determined by the symbols, and are not counted.
+    `cache` maps frozensets of clauses to their counts.
+    """
+
+    # Propagate unit clauses until none remain
+    clauses = list(clauses)
+    symbols = set(symbols)
+    while True:
+        unit = next((clause for clause in clauses if len(clause) == 1), None)
+        if unit is None:
+            break
+        literal = next(iter(unit))
+        symbols.discard(abs(literal))
+        clauses = simplify(clauses, literal)
+        if clauses is None:
+            return 0
+
+    # Symbols that no clause mentions can take either value
+    mentioned = set()
+    for clause in clauses:
+        mentioned.update(abs(literal) for literal in clause)
+    count = 2 ** len(symbols - mentioned)
+
+    # Count each independent group of clauses separately
+    for component in components(clauses):
+        key = frozenset(component)
+        if key not in cache:
+            variables = set()
+            for clause in component:
+                variables.update(abs(literal) for literal in clause)
+            cache[key] = count_component(
+                component, symbols & variables, cache
+            )
+        count *= cache[key]
+        if count == 0:
+            return 0
+    return count
+
+
+def count_component(clauses, symbols, cache):
+    """Counts the models of a connected group of clauses by splitting."""
+
+    # Split on the variable that occurs in the most clauses
+    occurrences = Counter()
+    for clause in clauses:
+        occurrences.update(abs(literal) for literal in clause)
+    p = max(occurrences, key=occurrences.get)
+
+    count = 0
+    for literal in (p, -p):
+        remaining = simplify(clauses, literal)
+        if remaining is not None:
+            count += count_clauses(remaining, symbols - {p}, cache)
+    return count
+
+
+def simplify(clauses, literal):
+    """
+    Returns the clauses that remain to be satisfied once `literal` is true,
+    or None if that makes some clause false.
+    """
+    remaining = []
+    for clause in clauses:
+        if literal in clause:
+            continue
+        if -literal in clause:
+            clause = clause - {-literal}
+            if not clause:
+                return None
+        remaining.append(clause)
+    return remaining
+
+
+def components(clauses):
+    """Splits clauses into groups that share no variables."""
+    parent = dict()
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for clause in clauses:
+        variables = [abs(literal) for literal in clause]
+        for variable in variables:
+            parent.setdefault(variable, variable)
+        root = find(variables[0])
+        for variable in variables[1:]:
+            parent[find(variable)] = root
+
+    groups = dict()
+    for clause in clauses:
+        groups.setdefault(find(abs(next(iter(clause)))), []).append(clause)
+    return list(groups.values())
+
+
+class BDD():
+    """
+    Manager for reduced ordered binary decision diagrams (BDDs).
+
+    Nodes are integers: `FALSE` (0) and `TRUE` (1) are the terminals, and
+    every other node is an index into `nodes`, which holds a
+    (level, low, high) triple: the node's symbol is `order[level]`, and
+    `low` and `high` are the nodes for when that symbol is false or true.
+    The unique table guarantees that equivalent sentences compile to the
+    same node, and the computed table caches the results of operations.
+    """
+
+    FALSE = 0
+    TRUE = 1
+
+    def __init__(self, order=()):
+        self.order = []
+        self.levels = dict()
+        self.nodes = [(float("inf"), None, None), (float("inf"), None, None)]
+        self.unique = dict()
+        self.computed = dict()
+        for symbol in order:
+            self.add_symbol(symbol)
+
+    def add_symbol(self, symbol):
+        """Adds a symbol below all existing symbols in the variable order."""
+        if symbol not in self.levels:
+            self.levels[symbol] = len(self.order)
+            self.order.append(symbol)
+
+    def node(self, level, low, high):
+        """Returns the unique node for a (level, low, high) triple."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        if key not in self.unique:
+            self.unique[key] = len(self.nodes)
+            self.nodes.append(key)
+        return self.unique[key]
+
+    def variable(self, symbol):
+        """Returns the node for a single symbol."""
+        self.add_symbol(symbol)
+        return self.node(self.levels[symbol], BDD.FALSE, BDD.TRUE)
+
+    def apply(self, operator, u, v):
+        """Combines nodes `u` and `v` with "and", "or" or "xor"."""
+
+        # Terminal cases
+        if operator == "and":
+            if u == BDD.FALSE or v == BDD.FALSE:
+                return BDD.FALSE
+            if u == BDD.TRUE or u == v:
+                return v
+            if v == BDD.TRUE:
+                return u
+        elif operator == "or":
+            if u == BDD.TRUE or v == BDD.TRUE:
+                return BDD.TRUE
+            if u == BDD.FALSE or u == v:
+                return v
+            if v == BDD.FALSE:
+                return u
+        elif operator == "xor":
+            if u == v:
+                return BDD.FALSE
+            if u == BDD.FALSE:
+                return v
+            if v == BDD.FALSE:
+                return u
+        else:
+            raise ValueError(f"unknown operator {operator}")
+
+        # All three operators are commutative
+        if u > v:
+            u, v = v, u
+        key = (operator, u, v)
+        if key in self.computed:
+            return self.computed[key]
+
+        # Split on whichever node's symbol comes first in the order
+        u_level, u_low, u_high = self.nodes[u]
+        v_level, v_low, v_high = self.nodes[v]
+        level = min(u_level, v_level)
+        if u_level != level:
+            u_low = u_high = u
+        if v_level != level:
+            v_low = v_high = v
+        result = self.node(
+            level,
+            self.apply(operator, u_low, v_low),
+            self.apply(operator, u_high, v_high)
+        )
+        self.computed[key] = result
+        return result
+
+    def negate(self, u):
+        """Returns the node for the negation of node `u`."""
+        return self.apply("xor", u, BDD.TRUE)
+
+    def compile(self, sentence):
+        """Returns the node equivalent to a logical sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return self.negate(self.compile(sentence.operand))
+        if isinstance(sentence, And):
+            result = BDD.TRUE
+            for conjunct in sentence.conjuncts:
+                result = self.apply("and", result, self.compile(conjunct))
+            return result
+        if isinstance(sentence, Or):
+            result = BDD.FALSE
+            for disjunct in sentence.disjuncts:
+                result = self.apply("or", result, self.compile(disjunct))
+            return result
+        if isinstance(sentence, Implication):
+            return self.apply("or",
+                              self.negate(self.compile(sentence.antecedent)),
+                              self.compile(sentence.consequent))
+        if isinstance(sentence, Biconditional):
+            return self.negate(self.apply("xor",
+                                          self.compile(sentence.left),
+                                          self.compile(sentence.right)))
+        raise TypeError("must be a logical sentence")
+
+    def count(self, u):
+        """Counts the models of node `u` over every symbol in the order."""
+        n = len(self.order)
+        cache = {BDD.FALSE: 0, BDD.TRUE: 1}
+
+        def level(u):
+            return min(self.nodes[u][0], n)
+
+        def count_node(u):
+            if u not in cache:
+                u_level, low, high = self.nodes[u]
+                cache[u] = (
+                    count_node(low) * 2 ** (level(low) - u_level - 1)
+                    + count_node(high) * 2 ** (level(high) - u_level - 1)
+                )
+            return cache[u]
+
+        return count_node(u) * 2 ** level(u)
+
+
+class CompiledKnowledge():
+    """
+    A knowledge base compiled into a binary decision diagram, so that
+    repeated queries against it take time polynomial in the diagram's size
+    instead of re-solving the knowledge base every time.
+
+    Conjuncts appended to the knowledge base later (with `And.add`) are
+    compiled and conjoined incrementally the next time it is queried.
+    `model_check` and `entailed_symbols` accept a `CompiledKnowledge` in
+    place of the knowledge base.
+    """
+
+    def __init__(self, knowledge, bdd=None, base=BDD.TRUE):
+        self.knowledge = knowledge
+        self.bdd = bdd if bdd is not None else BDD(order_symbols(knowledge))
+        self.root = base
+        self.compiled = 0
+        self.symbols = set()
+
+    def update(self):
+        """Conjoins any conjuncts added since the last query."""
+        if isinstance(self.knowledge, And):
+            conjuncts = self.knowledge.conjuncts
+        else:
+            conjuncts = [self.knowledge]
+        for conjunct in conjuncts[self.compiled:]:
+            self.symbols.update(conjunct.symbols())
+            self.root = self.bdd.apply("and", self.root,
+                                       self.bdd.compile(conjunct))
+        self.compiled = len(conjuncts)
+        return self.root
+
+    def entails(self, query):
+        """Checks if the knowledge base entails the query."""
+        root = self.update()
+        query = self.bdd.negate(self.bdd.compile(query))
+        return self.bdd.apply("and", root, query) == BDD.FALSE
+
+    def consistent(self, sentence=None):
+        """
+        Checks if the knowledge base has a model, or, if `sentence` is
+        given, a model in which `sentence` is also true.
+        """
+        root = self.update()
+        if sentence is not None:
+            root = self.bdd.apply("and", root, self.bdd.compile(sentence))
+        return root != BDD.FALSE
+
+    def condition(self, evidence):
+        """
+        Returns a new compiled knowledge base that also assumes `evidence`,
+        leaving this one unchanged. It shares this one's diagram, so only
+        the conjunction with the evidence is computed.
+        """
+        root = self.update()
+        conditioned = CompiledKnowledge(And(evidence), bdd=self.bdd,
+                                        base=root)
+        conditioned.symbols.update(self.symbols)
+        return conditioned
+
+    def count(self):
+        """Counts the models of the knowledge base over its own symbols."""
+        root = self.update()
+        free = len(self.bdd.order) - len(self.symbols)
+        return self.bdd.count(root) // 2 ** free
+
+
+def dump(knowledge, file):
+    """
+    Writes a knowledge base to a text file, one conjunct per line.
+
+    The format is line-based, in the style of DIMACS CNF files:
+
+        c a comment
+        p logic
+        s 1 rain
+        s 2 hagrid
+        > -1 2
+
+    `s` lines give each symbol a number, before its first use. Every
+    other line is one conjunct, in prefix notation: `n` is the nth
+    symbol and `-n` its negation, `!` negates the next sentence, `&k` and
+    `|k` join the next k sentences with And and Or, and `>` and `=` join
+    the next two with Implication and Biconditional.
+
+    Lines are written as soon as each conjunct has been visited, so the
+    knowledge base is never held in memory as one string.
+    """
+    numbers = dict()
+    file.write("p logic\n")
+    if isinstance(knowledge, And):
+        conjuncts = knowledge.conjuncts
+    else:
+        conjuncts = [knowledge]
+    for conjunct in conjuncts:
+        tokens = []
+        stack = [conjunct]
+        while stack:
+            sentence = stack.pop()
+            if isinstance(sentence, Not) and isinstance(sentence.operand,
+                                                        Symbol):
+                sentence = sentence.operand
+                sign = "-"
+            else:
+                sign = ""
+            if isinstance(sentence, Symbol):
+                if sentence.name not in numbers:
+                    if "\n" in sentence.name:
+                        raise ValueError("symbol names cannot span lines")
+                    numbers[sentence.name] = len(numbers) + 1
+                    file.write(f"s {numbers[sentence.name]} {sentence.name}\n")
+                tokens.append(f"{sign}{numbers[sentence.name]}")
+            elif isinstance(sentence, Not):
+                tokens.append("!")
+                stack.append(sentence.operand)
+            elif isinstance(sentence, And):
+                tokens.append(f"&{len(sentence.conjuncts)}")
+                stack.extend(reversed(sentence.conjuncts))
+            elif isinstance(sentence, Or):
+                tokens.append(f"|{len(sentence.disjuncts)}")
+                stack.extend(reversed(sentence.disjuncts))
+            elif isinstance(sentence, Implication):
+                tokens.append(">")
+                stack.extend((sentence.consequent, sentence.antecedent))
+            elif isinstance(sentence, Biconditional):
+                tokens.append("=")
+                stack.extend((sentence.right, sentence.left))
+            else:
+                raise TypeError("must be a logical sentence")
+        file.write(" ".join(tokens) + "\n")
+
+
+def load(file):
+    """
+    Reads a knowledge base written by `dump` from a text file, and returns
+    it as an And of its conjuncts.
+
+    Each line is parsed in a single left-to-right pass over its tokens,
+    so loading takes time linear in the size of the file.
+    """
+    symbols = dict()
+    knowledge = And()
+    for number, line in enumerate(file, 1):
+        line = line.rstrip("\n")
+        if not line or line[0] in "cp":
+            continue
+        if line.startswith("s "):
+            _, key, name = line.split(" ", 2)
+            symbols[key] = Symbol(name)
+            continue
+
+        # Each frame is an operator waiting for its operands
+        stack = []
+        result = None
+        for token in line.split():
+            if token == "!":
+                stack.append((Not, 1, []))
+                continue
+            if token in (">", "="):
+                operator = Implication if token == ">" else Biconditional
+                stack.append((operator, 2, []))
+                continue
+            if token[0] in "&|":
+                operator = And if token[0] == "&" else Or
+                stack.append((operator, int(token[1:]), []))
+                if stack[-1][1] > 0:
+                    continue
+                sentence = None
+            else:
+                key = token.lstrip("-")
+                if key not in symbols:
+                    raise ValueError(f"line {number}: unknown symbol {key}")
+                sentence = symbols[key]
+                if token[0] == "-":
+                    sentence = Not(sentence)
+
+            # Complete every operator that now has all of its operands
+            while True:
+                if sentence is not None:
+                    if not stack:
+                        if result is not None:
+                            raise ValueError(f"line {number}: extra tokens")
+                        result = sentence
+                        break
+                    stack[-1][2].append(sentence)
+                operator, arity, operands = stack[-1]
+                if len(operands) < arity:
+                    break
+                stack.pop()
+                sentence = operator(*operands)
+
+        if stack or result is None:
+            raise ValueError(f"line {number}: incomplete sentence")
+        knowledge.add(result)
+    return knowledge
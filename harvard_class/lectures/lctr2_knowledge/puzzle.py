@@ -50,6 +50,12 @@ knowledge.add(
     Symbol("MinervaGryffindor")
 )
 
-for symbol in symbols:
-    if model_check(knowledge, symbol):
+
+def main():
+    entailed, _, _ = entailed_symbols(knowledge, symbols)
+    for symbol in entailed:
         print(symbol)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import sys
+import time
+
+from minesweeper import ArrayMinesweeper, Minesweeper, MinesweeperAI
+
+# Board height, width and number of mines for each benchmark
+BOARDS = [
+    (8, 8, 8),
+    (16, 30, 99),
+    (100, 100, 500),
+    (1000, 1000, 20000)
+]
+
+# Moves to time on each board
+MOVES = 500
+
+# Board height, width and number of mines for timing board creation, and
+# whether the list-backed board is small enough to time as well
+CREATED = [
+    (100, 100, 1500, True),
+    (1000, 1000, 150000, True),
+    (3163, 3163, 1500000, False)
+]
+
+
+def create(board, height, width, mines):
+    """
+    Returns the seconds taken to create a board and ask it for the
+    number of mines near every cell in its first row.
+    """
+    start = time.perf_counter()
+    game = board(height=height, width=width, mines=mines)
+    for j in range(width):
+        game.nearby_mines((0, j))
+    return time.perf_counter() - start
+
+
+def play(height, width, mines, moves):
+    """
+    Makes `moves` AI moves on boards of a given shape, starting a new game
+    whenever the AI hits a mine or runs out of moves. Returns the number of
+    moves made and the seconds spent choosing them and updating the AI.
+    """
+    made = 0
+    elapsed = 0
+    while made < moves:
+        game = ArrayMinesweeper(height=height, width=width, mines=mines)
+        ai = MinesweeperAI(height=height, width=width, mine_count=mines,
+                           verbose=False)
+        while made < moves:
+            start = time.perf_counter()
+            move = ai.make_safe_move()
+            if move is None:
+                move = ai.make_random_move()
+            if move is None or game.is_mine(move):
+                elapsed += time.perf_counter() - start
+                break
+            ai.add_knowledge(move, game.nearby_mines(move))
+            elapsed += time.perf_counter() - start
+            made += 1
+    return made, elapsed
+
+
+def main():
+    moves = int(sys.argv[1]) if len(sys.argv) == 2 else MOVES
+    print(f"{'board':<14}{'mines':>7}{'moves':>7}{'moves/sec':>11}")
+    for height, width, mines in BOARDS:
+        made, elapsed = play(height, width, mines, moves)
+        print(f"{f'{height}x{width}':<14}{mines:>7}{made:>7}"
+              f"{made / elapsed:>11.0f}")
+
+    print(f"\n{'board':<14}{'mines':>9}{'list sec':>10}{'array sec':>11}")
+    for height, width, mines, listed in CREATED:
+        array = create(ArrayMinesweeper, height, width, mines)
+        lists = (f"{create(Minesweeper, height, width, mines):>10.3f}"
+                 if listed else f"{'-':>10}")
+        print(f"{f'{height}x{width}':<14}{mines:>9}{lists}{array:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,52 @@
+import collections
+import functools
 import itertools
+import math
 import random
+import time
+
+import numpy as np
+
+# Random cells to try before listing the remaining cells in make_random_move
+RANDOM_DRAWS = 20
+
+# Fraction of cells assumed to be mines when the AI isn't told how many
+# there are (the default 8 mines on an 8x8 board)
+DEFAULT_DENSITY = 8 / 64
+
+# Seconds make_random_move may spend enumerating frontier assignments
+GUESS_TIME_BUDGET = 0.1
+
+
+class NeighborTable(dict):
+    """
+    Maps each cell of a board with a given height and width to the tuple
+    of cells within one row and column of it, not including the cell
+    itself. A cell's neighbors are computed the first time they are looked
+    up, and then reused by everything playing on a board of that shape.
+    """
+
+    def __init__(self, height, width):
+        super().__init__()
+        self.height = height
+        self.width = width
+
+    def __missing__(self, cell):
+        i, j = cell
+        neighbors = tuple(
+            (x, y)
+            for x in range(max(i - 1, 0), min(i + 2, self.height))
+            for y in range(max(j - 1, 0), min(j + 2, self.width))
+            if (x, y) != cell
+        )
+        self[cell] = neighbors
+        return neighbors
+
+
+@functools.lru_cache(maxsize=None)
+def neighbor_table(height, width):
+    """Returns the shared NeighborTable for boards of a given shape."""
+    return NeighborTable(height, width)
 
 
 class Minesweeper():
@@ -33,6 +80,9 @@ class Minesweeper():
         # At first, player has found no mines
         self.mines_found = set()
 
+        # Cells adjacent to each cell on a board of this shape
+        self.neighbors = neighbor_table(height, width)
+
     def print(self):
         """
         Prints a text-based representation
@@ -59,29 +109,84 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
+        # Count the neighboring cells that are mines
         count = 0
+        for i, j in self.neighbors[cell]:
+            if self.board[i][j]:
+                count += 1
 
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
+        return count
 
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
+    def won(self):
+        """
+        Checks if all mines have been flagged.
+        """
+        return self.mines_found == self.mines
 
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
 
-        return count
+class ArrayMinesweeper(Minesweeper):
+    """
+    Minesweeper game whose board is a NumPy array, for boards too large
+    to build cell by cell. Mines are drawn without replacement, and every
+    cell's count of nearby mines is computed once when the board is made.
+    """
+
+    def __init__(self, height=8, width=8, mines=8, seed=None):
+
+        # Set initial width, height, and number of mines
+        self.height = height
+        self.width = width
+        self.mine_count = mines
+
+        # Draw the mines from Python's random module unless given a seed,
+        # so random.seed makes both kinds of board reproducible
+        if seed is None:
+            seed = random.getrandbits(64)
+        rng = np.random.default_rng(seed)
+        cells = rng.choice(height * width, mines, replace=False)
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[cells] = True
+
+        # Convolve the board with a 3x3 kernel of ones, leaving out the
+        # center, by adding up shifted slices of a zero-padded copy
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = np.zeros((height, width), dtype=np.uint8)
+        for di, dj in itertools.product(range(3), repeat=2):
+            if (di, dj) != (1, 1):
+                self.counts += padded[di:di + height, dj:dj + width]
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+        # Cells adjacent to each cell on a board of this shape
+        self.neighbors = neighbor_table(height, width)
+
+    @functools.cached_property
+    def mines(self):
+        """
+        The set of cells that are mines, built the first time it's needed.
+        """
+        return set(zip(*map(np.ndarray.tolist, np.nonzero(self.board))))
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.board[i, j])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        return int(self.counts[i, j])
 
     def won(self):
         """
         Checks if all mines have been flagged.
         """
-        return self.mines_found == self.mines
+        return (len(self.mines_found) == self.mine_count
+                and self.mines_found == self.mines)
 
 
 class Sentence():
@@ -104,23 +209,36 @@ class Sentence():
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def key(self):
+        """
+        Returns a hashable value identifying the sentence's contents.
+        """
+        return (frozenset(self.cells), self.count)
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        return self.mine_cells
+        if self.cells and len(self.cells) == self.count:
+            return set(self.cells)
+        return set()
 
     def known_safes(self):
         """
         Returns the set of all cells in self.cells known to be safe.
         """
-        return self.safe_cells
+        if self.count == 0:
+            return set(self.cells)
+        return set()
 
     def mark_mine(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         """
+        if cell in self.cells:
+            self.cells.remove(cell)
+            self.count -= 1
         self.mine_cells.add(cell)
 
     def mark_safe(self, cell):
@@ -128,19 +246,37 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
+        if cell in self.cells:
+            self.cells.remove(cell)
         self.safe_cells.add(cell)
-        
+
 
 class MinesweeperAI():
     """
     Minesweeper game player
     """
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mine_count=None, verbose=True,
+                 linear=False):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Whether to print diagnostic output about moves and knowledge
+        self.verbose = verbose
+
+        # Whether to row-reduce the frontier sentences when the pairwise
+        # subset rules leave no safe moves
+        self.linear = linear
+
+        # Total number of mines on the board, estimated if not given
+        if mine_count is None:
+            mine_count = round(height * width * DEFAULT_DENSITY)
+        self.mine_count = mine_count
+
+        # Cells adjacent to each cell on a board of this shape
+        self.neighbors = neighbor_table(height, width)
+
         # All available moves at start of game
         self.available_moves = set()
 
@@ -151,9 +287,169 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells that have not been clicked on yet
+        self.safe_moves = set()
+
+        # Sentences about the game known to be true, by serial number.
+        # Sentences change as cells are marked, and equal sentences can
+        # be different objects, so they are keyed by the serial number
+        # add_sentence gives them rather than hashed
+        self.knowledge = dict()
+
+        # Sentences containing each cell, by serial number, so that
+        # learning about a cell only touches the sentences it appears in
+        self.cell_sentences = dict()
+
+        # Sentence in the knowledge base with each key, to drop duplicates
+        self.signatures = dict()
+
+        # Newly learned (cell, is_mine) facts not yet applied to sentences
+        self.facts = collections.deque()
+
+        # New or changed sentences not yet compared with their neighbors
+        self.changed = collections.deque()
+
+        # Consistent assignments of each frontier component, by the keys
+        # of the component's sentences
+        self.component_cache = dict()
+
+        # Serial numbers for sentences added to the knowledge base, in
+        # order, so every game iterates over its sentences in the same order
+        self.serials = itertools.count()
 
+    def mark_mine(self, cell):
+        """
+        Marks a cell as a mine, and updates all knowledge
+        to mark that cell as a mine as well.
+        """
+        self.learn(cell, True)
+        self.infer()
+
+    def mark_safe(self, cell):
+        """
+        Marks a cell as safe, and updates all knowledge
+        to mark that cell as safe as well.
+        """
+        self.learn(cell, False)
+        self.infer()
+
+    def learn(self, cell, is_mine):
+        """
+        Records a fact about a cell, queueing it to be applied to the
+        knowledge base unless it was already known.
+        """
+        if cell in self.mines or cell in self.safes:
+            return
+        if is_mine:
+            self.mines.add(cell)
+            self.available_moves.discard(cell)
+        else:
+            self.safes.add(cell)
+            if cell not in self.moves_made:
+                self.safe_moves.add(cell)
+        self.facts.append((cell, is_mine))
+
+    def infer(self):
+        """
+        Applies queued facts to the sentences containing their cells, and
+        derives new sentences from new or changed ones, until nothing new
+        is learned.
+        """
+        while self.facts or self.changed:
+
+            # Apply all known facts before looking for subsets
+            if self.facts:
+                cell, is_mine = self.facts.popleft()
+                for sentence in self.cell_sentences.pop(cell, {}).values():
+                    del self.signatures[sentence.key()]
+                    if is_mine:
+                        sentence.mark_mine(cell)
+                    else:
+                        sentence.mark_safe(cell)
+
+                    # Drop the sentence if it is now empty or a duplicate
+                    if not sentence.cells or sentence.key() in self.signatures:
+                        self.remove_sentence(sentence)
+                    else:
+                        self.signatures[sentence.key()] = sentence
+                        self.check_sentence(sentence)
+                        self.changed.append(sentence)
+            else:
+                sentence = self.changed.popleft()
+                if sentence.serial in self.knowledge:
+                    self.infer_subsets(sentence)
+
+    def infer_subsets(self, sentence):
+        """
+        Compares a sentence with the other sentences sharing a cell with
+        it. Whenever one's cells are a subset of the other's, the larger
+        sentence is replaced by the difference of the two.
+        """
+        others = dict()
+        for cell in sentence.cells:
+            others.update(self.cell_sentences[cell])
+        others.pop(sentence.serial, None)
+
+        for other in others.values():
+            if sentence.serial not in self.knowledge:
+                return
+            if other.serial not in self.knowledge:
+                continue
+            if sentence.cells < other.cells:
+                subset, superset = sentence, other
+            elif other.cells < sentence.cells:
+                subset, superset = other, sentence
+            else:
+                continue
+            derived = Sentence(superset.cells - subset.cells,
+                               superset.count - subset.count)
+            derived.initial_cell = superset.initial_cell
+            if self.verbose:
+                print(f'NEW SENTENCE CREATED FROM TWO OTHERS')
+                print(f'Subset Sentence: {subset}')
+                print(f'Superset Sentence: {superset}')
+                print(f'Derived Sentence: {derived}')
+            self.remove_sentence(superset)
+            self.add_sentence(derived)
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and indexes its cells,
+        unless it is empty or already known.
+        """
+        if not sentence.cells or sentence.key() in self.signatures:
+            return
+        sentence.serial = next(self.serials)
+        self.knowledge[sentence.serial] = sentence
+        self.signatures[sentence.key()] = sentence
+        for cell in sentence.cells:
+            self.cell_sentences.setdefault(cell, dict())[sentence.serial] = (
+                sentence
+            )
+        self.check_sentence(sentence)
+        self.changed.append(sentence)
+
+    def remove_sentence(self, sentence):
+        """
+        Removes a sentence from the knowledge base and the cell index.
+        """
+        self.knowledge.pop(sentence.serial, None)
+        if self.signatures.get(sentence.key()) is sentence:
+            del self.signatures[sentence.key()]
+        for cell in sentence.cells:
+            self.cell_sentences[cell].pop(sentence.serial, None)
+
+    def check_sentence(self, sentence):
+        """
+        Learns any cells a sentence determines.
+        """
+        mines = sentence.known_mines()
+        if mines and self.verbose:
+            print(f'\nMINES FOUND IN SENTENCE FOR CELL {sentence.initial_cell}: {mines}')
+        for cell in mines:
+            self.learn(cell, True)
+        for cell in sentence.known_safes():
+            self.learn(cell, False)
 
     def add_knowledge(self, cell, count):
         """
@@ -164,210 +460,80 @@ class MinesweeperAI():
         #-----------------------------------------------------------------
         # 1. Add cell to self.moves_made and self.safes, and remove cell
         #    from self.available_moves as it is not longer available
-        #----------------------------------------------------------------- 
-   
+        #-----------------------------------------------------------------
+
         # 1a. Add cell to self.moves_made and self.safes
         self.moves_made.add(cell)
-        self.safes.add(cell)
-        
+        self.safe_moves.discard(cell)
+        self.learn(cell, False)
+
         # 1b. Remove cell from available moves
-        if len(self.available_moves) > 0:
-            if cell in self.available_moves:
-                self.available_moves.remove(cell)
+        self.available_moves.discard(cell)
 
 
         #-----------------------------------------------------------------
-        # 2. Get current move cells neighbors (if any), if count = 0,
-        #    then add them to safe moves
+        # 2. Get current move cells neighbors that are still unknown,
+        #    counting only the mines that are not already known
         #-----------------------------------------------------------------
 
-        # 2a. Get all of current cells neighbors that are still available
         neighbors = set()
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-                if (i, j) == cell or i < 0 or j < 0 or i >= 8 or j >= 8:
-                    continue
-                else:
-                    if (i,j) not in self.moves_made:
-                        neighbors.add((i,j))
-
-        # 2b. Mark all available neighbors of current cell that are safe
-        if count == 0:
-            for neighbor in neighbors:
-                if neighbor not in self.moves_made:
-                    self.safes.add(neighbor)
+        for neighbor in self.neighbors[cell]:
+            if neighbor in self.mines:
+                count -= 1
+            elif neighbor not in self.safes:
+                neighbors.add(neighbor)
 
 
         #-----------------------------------------------------------------
-        # 3. Create sentence for all available neighbors and add to KB
+        # 3. Create sentence for all unknown neighbors and add to KB.
+        #    If count == 0 they are all safe, and if there are as many
+        #    neighbors as count they are all mines.
         #-----------------------------------------------------------------
-        
-        # If count of nearby cells passed in from runner.py == 0,
-        # OR if then length of neighbors == count (all bombs), no sentence 
-        if count == 0 or len(neighbors) == count:
-            #print('DONT NEED TO CREATE A SENTENCE')
-            pass            
-        else: 
+
+        if neighbors:
             sentence = Sentence(neighbors, count)
             sentence.initial_cell.add(cell)
             sentence.safe_cells.add(cell)
-            sentence.initial_cell.add(cell)
-            self.knowledge.append(sentence)
-            print(f'---------------------------------------------------')
-            print(f'\nNEW SENTENCE CREATED:')
-            print(f'Move Cell: {sentence.initial_cell}')
-            print(f'Neighbor Cells: {sentence.cells}')
-            print(f'Bomb Count: {sentence.count}')
-            print(f'---------------------------------------------------')
-         
-        
+            if self.verbose:
+                print(f'---------------------------------------------------')
+                print(f'\nNEW SENTENCE CREATED:')
+                print(f'Move Cell: {sentence.initial_cell}')
+                print(f'Neighbor Cells: {sentence.cells}')
+                print(f'Bomb Count: {sentence.count}')
+                print(f'---------------------------------------------------')
+            self.add_sentence(sentence)
+
+
         #-----------------------------------------------------------------
-        # 4. Update all sentences to reflect current cell information
+        # 4. Apply every newly learned safe cell and mine to the
+        #    sentences containing it, and replace any sentence that is a
+        #    superset of another by their difference, until nothing new
+        #    is learned
         #-----------------------------------------------------------------
 
-        # 4a. Remove current moves cell from all sentences        
-        if len(self.knowledge) > 0:
-            for i, sentence in enumerate(self.knowledge):
-                # 4a. Remove the current moves cell from each sentence that
-                #     contains it as the cell is no longer a threat.
-                if cell in sentence.cells:
-                    sentence.safe_cells.add(cell)
-                    sentence.cells.remove(cell)
-                    
-                  
-        # 4b. Check sentences to see if the length of sentence matches the count value
-        #     if so then the sentence only contains mines. So add them to self.mines
-        #     and sentence mine_cells
-        if len(self.knowledge) > 0:
-            for i, sentence in enumerate(self.knowledge):
-                if sentence.count == len(sentence.cells):
-                    for cell in sentence.cells:
-                        self.mines.add(cell)
-                        sentence.mine_cells.add(cell)
-                        if cell in self.available_moves:  
-                            self.available_moves.remove(cell)
-                    print(f'\nMINE FOUND IN SENTENCE FOR CEL {sentence.initial_cell}:')
-                    print(f'Move Cell: {sentence.initial_cell}')
-                    print(f'Neighbor Cells: {sentence.cells}')
-                    print(f'Bomb Count: {sentence.count}')
-                    print(f'Safe Cells: {sentence.safe_cells}')
-                    print(f'Mine Cells: {sentence.mine_cells}')
-                    print(f'---------------------------------------------------')
-             
-                
-        # 4c. Check each sentence for existing known mines from self.mines
-        #     if a mine from self.mines is found in the sentence, then
-        #     remove the mine and re-check the length to see if it matches
-        #     the count. If so, the remaining cells are safe and the sentence
-        #     can be deleted
-        if len(self.mines) > 0 and len(self.knowledge) > 0:
-            for mine in self.mines:
-                for sentence in self.knowledge:
-                    if mine in sentence.cells:
-                        if sentence.count == 1:
-                            # remove mine from sentence, and mark other cells safe
-                            sentence.cells.remove(mine)
-                            for c in sentence.cells:
-                                print(f'{c} ADDED TO SAFE CELLS ')
-                                self.safes.add(c)
-                                sentence.safe_cells.add(c)                      
-                        else:
-                            # remove mine from sentence and subtract 1 from count
-                            print(f'SENTENCE ADJUSTED FOR MINE:')
-                            print(f'Original Sentence: {sentence}, Count: {sentence.count}')
-                            sentence.mine_cells.add(mine)
-                            sentence.cells.remove(mine)
-                            sentence.count -= 1 
-                            print(f'Adjusted Sentence: {sentence}, Count: {sentence.count}\n')
-
-
-        # 4d Remove all safe cells from sentences (internal to sentences)
-        if len(self.knowledge) > 0 and len(self.safes) > 0:
-            for safe_cell in self.safes:
-                for sentence in self.knowledge:
-                    if safe_cell in sentence.cells:
-                        sentence.cells.remove(safe_cell)
-                        sentence.safe_cells.add(safe_cell)
-                        
-                        # Now that cell removed, do mine check
-                        if sentence.cells == sentence.count:
-                            for cell in sentence.cells:
-                                self.mines.add(cell)
-                                sentence.mine_cells.add(cell)
-                                if cell in self.available_moves:  
-                                    self.available_moves.remove(cell) 
-                            print(f'\nMINE FOUND IN SENTENCE FOR CEL {sentence.initial_cell}:')
-                            print(f'Move Cell: {sentence.initial_cell}')
-                            print(f'Neighbor Cells: {sentence.cells}')
-                            print(f'Bomb Count: {sentence.count}')
-                            print(f'Safe Cells: {sentence.safe_cells}')
-                            print(f'Mine Cells: {sentence.mine_cells}')
-                            print(f'---------------------------------------------------')     
-
-                    
-        # 4e. Perform one final mine check against all sentences and delete as necessary
-        if len(self.mines) > 0 and len(self.knowledge) > 0:
-            for mine in self.mines:
-                for sentence in self.knowledge:
-                    if mine in sentence.cells:
-                        if sentence.count == 1:
-                            # remove mine from sentence, add all other cells to self.safes, 
-                            # then delete sentence
-                            sentence.cells.remove(mine)
-                            for c in sentence.cells:
-                                print(f'{c} ADDED TO SAFE CELLS ')
-                                self.safes.add(c)
-                                sentence.safe_cells.add(c)
-
-                        else:
-                            # remove mine from sentence and subtract 1 from count
-                            print(f'SENTENCE ADJUSTED FOR MINE:')
-                            print(f'Original Sentence: {sentence}, Count: {sentence.count}')
-                            sentence.mine_cells.add(mine)
-                            sentence.cells.remove(mine)
-                            sentence.count -= 1 
-                            print(f'Adjusted Sentence: {sentence}, Count: {sentence.count}\n')
+        self.infer()
 
 
         #-----------------------------------------------------------------
-        # 5. Create subsets from existing sentences if possible
+        # 5. If no safe move is known, solve the sentences together as a
+        #    linear system for any cells they force in combination
         #-----------------------------------------------------------------
-      
-#        # 5b. Create new Sentence if possible
-#        if len(self.knowledge) > 1:
-#            for i in range(0, len(self.knowledge)-1):
-#                for j in range(i+1, len(self.knowledge)):
-#                    if self.knowledge[i].cells == self.knowledge[j].cells:
-#                        continue  
-#                    elif self.knowledge[i].count == self.knowledge[j].count:
-#                        continue
-#                    elif not self.knowledge[i].cells.intersection(self.knowledge[j].cells):
-#                        continue
-#                    else:
-#                        print(f'NEW SENTENCE CREATED FROM TWO OTHERS')
-#                        print(f'Original Sentence #{i}: {self.knowledge[i].cells}, Count: {self.knowledge[i].count}')
-#                        print(f'Original Sentence #{j}: {self.knowledge[j].cells}, Count: {self.knowledge[j].count}')
-#                        if self.knowledge[i].count > self.knowledge[j].count:
-#                            new_s = self.knowledge[i].cells - self.knowledge[j].cells
-#                            new_c = self.knowledge[i].count - self.knowledge[j].count
-#                            self.knowledge.append(Sentence(new_s, new_c) )
-#                        else:
-#                            new_s = self.knowledge[j].cells - self.knowledge[i].cells
-#                            new_c = self.knowledge[j].count - self.knowledge[i].count
-#                            self.knowledge.append(Sentence(new_s, new_c))
+
+        while self.linear and not self.safe_moves and self.solve_linear():
+            pass
+
+        if not self.verbose:
+            return
 
         print(f'All Available Moves: {self.available_moves}\n')
         print(f'All Moves Made: {self.moves_made}\n')
         print(f'All Marked Safes: {self.safes}\n')
         print(f'All Marked Mines: {self.mines}\n')
-  
-        for i, s in enumerate(self.knowledge):
+
+        for i, s in enumerate(self.knowledge.values()):
             print(f'Number of Senteces in KB: {len(self.knowledge)}')
             print(f'KB S{i}: {s}, Count: {s.count}\n')
-                            
 
-                               
-                                    
     def make_safe_move(self):
         """
         Returns a safe cell to choose on the Minesweeper board.
@@ -377,17 +543,14 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """       
-        # ALWAYS RUN A CHECK TO ENSURE THAT NO MINES IN MINE LIST ARE IN SAFES LIST
-        # IF THEY ARE, MUST REMOVE THE MINE MOVE FROM SAFES
-
-        if len(self.safes) == 0:
-            return None
-        else:
-            for c in self.safes:
-                if c not in self.moves_made:
+        # self.safe_moves holds the safe cells not yet clicked on, so there
+        # is no need to search through every safe cell for one
+        for c in self.safe_moves:
+            if c not in self.moves_made:
+                if self.verbose:
                     print(f'Safe Move: {c}')
-                    return(c)
-                    break
+                return(c)
+        return None
 
 
     def make_random_move(self):
@@ -396,12 +559,345 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+
+        Chooses the cell least likely to be a mine, according to
+        self.mine_probabilities(), and randomly among cells that no
+        sentence mentions when those are the least likely.
         """
-        # If KB is empty, make random move
-        if len(self.available_moves) == 0:
-            for i in range(0, self.height):
-                for j in range(0, self.height):
-                    self.available_moves.add((i,j))
-        rmove = random.choice(list(self.available_moves))
-        print(f'Random Move: {rmove}')
+        probabilities, unconstrained = self.mine_probabilities()
+        if probabilities:
+            lowest = min(probabilities.values())
+            if lowest <= unconstrained:
+                rmove = random.choice(sorted(
+                    cell for cell, p in probabilities.items()
+                    if p <= lowest + 1e-9
+                ))
+                if self.verbose:
+                    print(f'Guess Move: {rmove}, '
+                          f'Mine Probability: {lowest:.3f}')
+                return(rmove)
+
+        # While most of the board is unexplored, a few random draws
+        # find an unused cell without listing every cell on the board
+        for _ in range(RANDOM_DRAWS):
+            rmove = (random.randrange(self.height),
+                     random.randrange(self.width))
+            if (rmove not in self.moves_made and rmove not in self.mines
+                    and rmove not in probabilities):
+                if self.verbose:
+                    print(f'Random Move: {rmove}')
+                return(rmove)
+
+        # Otherwise choose among all remaining cells
+        self.available_moves = set(
+            (i, j)
+            for i in range(self.height)
+            for j in range(self.width)
+            if (i, j) not in self.moves_made and (i, j) not in self.mines
+        )
+        choices = self.available_moves - probabilities.keys()
+        if len(choices) == 0:
+            choices = self.available_moves
+        if len(choices) == 0:
+            return None
+        rmove = random.choice(list(choices))
+        if self.verbose:
+            print(f'Random Move: {rmove}')
         return(rmove)
+
+    def solve_linear(self):
+        """
+        Writes each frontier component's sentences as a 0/1 matrix with one
+        row per sentence and one column per cell, augmented by the counts,
+        and row-reduces it. A reduced row whose count equals the sum of its
+        positive coefficients makes those cells mines and the cells with
+        negative coefficients safe, and the reverse when the count equals
+        the sum of its negative coefficients.
+
+        Learns the forced cells and returns how many there were.
+        """
+        learned = 0
+        for component in self.frontier_components():
+            cells = sorted(set().union(*(s.cells for s in component)))
+            position = {cell: index for index, cell in enumerate(cells)}
+            rows = [r for r, s in enumerate(component) for _ in s.cells]
+            columns = [position[c] for s in component for c in s.cells]
+            matrix = np.zeros((len(component), len(cells) + 1))
+            matrix[rows, columns] = 1
+            matrix[:, -1] = [sentence.count for sentence in component]
+
+            mines, safes = forced_cells(row_reduce(matrix))
+            for index in np.flatnonzero(mines):
+                self.learn(cells[index], True)
+            for index in np.flatnonzero(safes):
+                self.learn(cells[index], False)
+            learned += int(mines.sum() + safes.sum())
+
+        if learned and self.verbose:
+            print(f'\nLINEAR SOLVER FOUND {learned} CELLS')
+        self.infer()
+        return learned
+
+    def mine_probabilities(self):
+        """
+        Estimates the probability that each unknown cell is a mine.
+
+        Returns a dictionary mapping every cell in some sentence (the
+        frontier) to its probability, and the probability shared by all
+        other unknown cells. The frontier is split into components that
+        share no cells, the assignments consistent with each component
+        are enumerated, and each total number of frontier mines is then
+        weighted by the ways the remaining mines fit in the other cells.
+        """
+        deadline = time.perf_counter() + GUESS_TIME_BUDGET
+        unknown = self.height * self.width - len(self.mines) - len(self.safes)
+        remaining = self.mine_count - len(self.mines)
+
+        # Enumerate each component, or fall back to the densest sentence
+        # containing each cell if the time budget runs out
+        probabilities = dict()
+        components = []
+        for component in self.frontier_components():
+            key = frozenset(sentence.key() for sentence in component)
+            if key not in self.component_cache:
+                result = self.enumerate_component(component, deadline)
+                if result is None:
+                    estimates = dict()
+                    for sentence in component:
+                        density = sentence.count / len(sentence.cells)
+                        for cell in sentence.cells:
+                            estimates[cell] = max(estimates.get(cell, 0),
+                                                  density)
+                    probabilities.update(estimates)
+                    remaining -= round(sum(estimates.values()))
+                    continue
+                self.component_cache[key] = result
+            components.append(self.component_cache[key])
+
+        unconstrained = unknown - len(probabilities) - sum(
+            len(cells) for cells, _, _ in components
+        )
+
+        def log_ways(mines):
+            """
+            Log of the ways to place the mines that are left once the
+            frontier holds `mines`, or None if there are none.
+            """
+            rest = remaining - mines
+            if rest < 0 or rest > unconstrained:
+                return None
+            return (math.lgamma(unconstrained + 1) - math.lgamma(rest + 1)
+                    - math.lgamma(unconstrained - rest + 1))
+
+        # Probability of each cell in each component, over every way of
+        # filling the other components and the unconstrained cells
+        for i, (cells, counts, mine_counts) in enumerate(components):
+            others = {0: 1}
+            for j, (_, other_counts, _) in enumerate(components):
+                if j != i:
+                    others = convolve(others, other_counts)
+            logs = dict()
+            for k in counts:
+                log = log_sum_exp([
+                    math.log(ways) + log_ways(k + rest)
+                    for rest, ways in others.items()
+                    if log_ways(k + rest) is not None
+                ])
+                if log is not None:
+                    logs[k] = log
+            if not logs:
+                continue
+            top = max(logs.values())
+            weights = {k: math.exp(log - top) for k, log in logs.items()}
+            total = sum(counts[k] * weight for k, weight in weights.items())
+            for index, cell in enumerate(cells):
+                probabilities[cell] = sum(
+                    mine_counts[k][index] * weight
+                    for k, weight in weights.items()
+                ) / total
+
+        # Expected share of the remaining mines in each unconstrained cell
+        if not unconstrained:
+            return probabilities, 1
+        frontier = {0: 1}
+        for _, counts, _ in components:
+            frontier = convolve(frontier, counts)
+        logs = {
+            k: math.log(ways) + log_ways(k)
+            for k, ways in frontier.items()
+            if log_ways(k) is not None
+        }
+        if not logs:
+            return probabilities, DEFAULT_DENSITY
+        top = max(logs.values())
+        weights = {k: math.exp(log - top) for k, log in logs.items()}
+        expected = sum(
+            (remaining - k) * weight for k, weight in weights.items()
+        )
+        return probabilities, expected / sum(weights.values()) / unconstrained
+
+    def frontier_components(self):
+        """
+        Splits the knowledge base into groups of sentences such that no two
+        groups share a cell.
+        """
+        components = []
+        seen = set()
+        for start in self.knowledge.values():
+            if start.serial in seen:
+                continue
+            seen.add(start.serial)
+            component, stack = [], [start]
+            while stack:
+                sentence = stack.pop()
+                component.append(sentence)
+                for cell in sentence.cells:
+                    for serial, other in self.cell_sentences[cell].items():
+                        if serial not in seen:
+                            seen.add(serial)
+                            stack.append(other)
+            components.append(component)
+        return components
+
+    def enumerate_component(self, sentences, deadline):
+        """
+        Enumerates the mine assignments to a component's cells that are
+        consistent with all of its sentences.
+
+        Returns (cells, counts, mine_counts): for each number of mines k,
+        counts[k] is how many assignments have k mines, and mine_counts[k]
+        lists how many of those make each of the cells a mine. Returns
+        None if the deadline passes first.
+        """
+
+        # Order cells sentence by sentence, so each is completed early
+        cells = []
+        for sentence in sentences:
+            for cell in sorted(sentence.cells):
+                if cell not in cells:
+                    cells.append(cell)
+        position = {cell: index for index, cell in enumerate(cells)}
+
+        # Sentences to check when each cell is assigned
+        checks = [[] for _ in cells]
+        for sentence in sentences:
+            members = [position[cell] for cell in sentence.cells]
+            for index in members:
+                checks[index].append((sentence.count, members))
+
+        counts = dict()
+        mine_counts = dict()
+        assignment = [0] * len(cells)
+
+        def consistent(index):
+            for count, members in checks[index]:
+                mines = sum(assignment[m] for m in members if m <= index)
+                unassigned = sum(1 for m in members if m > index)
+                if mines > count or mines + unassigned < count:
+                    return False
+            return True
+
+        # Depth-first search over the cells in order, keeping the next value
+        # to try for each cell rather than recursing, so that components
+        # of any length fit on the stack
+        following = [0] * len(cells)
+        index = mines = nodes = 0
+        while index >= 0:
+            nodes += 1
+            if nodes % 1000 == 0 and time.perf_counter() > deadline:
+                return None
+            if index == len(cells):
+                counts[mines] = counts.get(mines, 0) + 1
+                totals = mine_counts.setdefault(mines, [0] * len(cells))
+                for m, value in enumerate(assignment):
+                    totals[m] += value
+            elif following[index] < 2:
+                value = following[index]
+                following[index] += 1
+                assignment[index] = value
+                if consistent(index):
+                    mines += value
+                    index += 1
+                continue
+            else:
+                following[index] = 0
+                assignment[index] = 0
+
+            # Go back to the previous cell
+            index -= 1
+            if index >= 0:
+                mines -= assignment[index]
+
+        return cells, counts, mine_counts
+
+
+def convolve(first, second):
+    """
+    Combines two mappings from numbers of mines to numbers of assignments
+    into the mapping for both groups of cells together.
+    """
+    result = dict()
+    for i, a in first.items():
+        for j, b in second.items():
+            result[i + j] = result.get(i + j, 0) + a * b
+    return result
+
+
+def log_sum_exp(logs):
+    """
+    Returns the log of the sum of the exponentials of `logs`,
+    or None if `logs` is empty.
+    """
+    if not logs:
+        return None
+    top = max(logs)
+    return top + math.log(sum(math.exp(log - top) for log in logs))
+
+
+def row_reduce(matrix):
+    """
+    Returns the reduced row echelon form of an augmented matrix, whose
+    last column holds the right-hand sides.
+    """
+    matrix = matrix.astype(float)
+    rows, columns = matrix.shape
+    pivot = 0
+    for column in range(columns - 1):
+        if pivot == rows:
+            break
+
+        # Swap the largest entry in the column into the pivot row
+        best = pivot + int(np.argmax(np.abs(matrix[pivot:, column])))
+        if abs(matrix[best, column]) < 1e-9:
+            continue
+        matrix[[pivot, best]] = matrix[[best, pivot]]
+        matrix[pivot] /= matrix[pivot, column]
+
+        # Clear the column from every other row at once
+        factors = matrix[:, column].copy()
+        factors[pivot] = 0
+        matrix -= np.outer(factors, matrix[pivot])
+        pivot += 1
+
+    matrix[np.abs(matrix) < 1e-9] = 0
+    return matrix
+
+
+def forced_cells(reduced):
+    """
+    Given a reduced augmented matrix over 0/1 unknowns, returns boolean
+    arrays marking the unknowns that every solution makes 1 (mines) and
+    those that every solution makes 0 (safe cells).
+    """
+    coefficients, totals = reduced[:, :-1], reduced[:, -1]
+    positive = coefficients > 0
+    negative = coefficients < 0
+
+    # Rows at their largest possible total need every positive unknown
+    # set and every negative one clear, and rows at their smallest the
+    # reverse
+    upper = np.isclose(totals, np.where(positive, coefficients, 0).sum(1))
+    lower = np.isclose(totals, np.where(negative, coefficients, 0).sum(1))
+    mines = (upper[:, None] & positive) | (lower[:, None] & negative)
+    safes = (upper[:, None] & negative) | (lower[:, None] & positive)
+    return mines.any(0), safes.any(0)
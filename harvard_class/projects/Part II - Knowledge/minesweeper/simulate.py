@@ -0,0 +1,91 @@
+import multiprocessing
+import random
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+HEIGHT = 8
+WIDTH = 8
+MINES = 8
+GAMES = 1000
+
+
+def main():
+
+    # Check usage
+    if len(sys.argv) not in [1, 2, 5, 6]:
+        sys.exit("Usage: python simulate.py [games [height width mines "
+                 "[processes]]]")
+
+    # Parse command-line arguments
+    args = [int(arg) for arg in sys.argv[1:]]
+    games = args[0] if args else GAMES
+    height, width, mines = args[1:4] if len(args) >= 4 else (
+        HEIGHT, WIDTH, MINES
+    )
+    processes = args[4] if len(args) == 5 else None
+
+    results = simulate(games, height, width, mines, processes)
+    print(f"Board: {height}x{width}, {mines} mines")
+    print(f"Games: {results['games']}")
+    print(f"Wins: {results['wins']} ({results['win_rate']:.1%})")
+    print(f"Average moves: {results['average_moves']:.1f}")
+    print(f"Moves/sec: {results['moves_per_second']:.0f}")
+
+
+def simulate(games, height, width, mines, processes=None, seed=0,
+             linear=False):
+    """
+    Plays `games` headless games of Minesweeper with MinesweeperAI, with
+    diagnostic output turned off, spread across a pool of `processes`
+    worker processes (by default, one per CPU). If `linear` is true, the
+    AI also row-reduces its sentences whenever it runs out of safe moves.
+
+    Game `i` is seeded with `seed + i`, so the same arguments always
+    produce the same boards and the same moves. Returns a dictionary of
+    totals: games, wins, win_rate, average_moves and moves_per_second,
+    where moves per second is measured across all workers.
+    """
+    start = time.perf_counter()
+    tasks = [(seed + i, height, width, mines, linear) for i in range(games)]
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(play, tasks, chunksize=max(1, games // 64))
+    elapsed = time.perf_counter() - start
+
+    wins = sum(won for won, _ in results)
+    moves = sum(made for _, made in results)
+    return {
+        "games": games,
+        "wins": wins,
+        "win_rate": wins / games if games else 0,
+        "average_moves": moves / games if games else 0,
+        "moves_per_second": moves / elapsed if elapsed else 0
+    }
+
+
+def play(task):
+    """
+    Plays one seeded game until the AI hits a mine or has revealed
+    every safe cell. Returns whether it won and how many moves it made.
+    """
+    seed, height, width, mines, linear = task
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mine_count=mines,
+                       verbose=False, linear=linear)
+    safe_cells = height * width - mines
+    moves = 0
+    while len(ai.moves_made) < safe_cells:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None or game.is_mine(move):
+            return False, moves
+        ai.add_knowledge(move, game.nearby_mines(move))
+        moves += 1
+    return True, moves
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from generate import generate, write_corpus
+from pagerank import (DAMPING, SOLVERS, ConvergenceReport, crawl,
+                      iterate_pagerank, sample_pagerank)
+
+# Numbers of pages in each generated corpus
+SIZES = [1000, 10000, 100000]
+
+# Clusters each corpus is split into
+CLUSTERS = 4
+
+# Numbers of samples to compare iteration with
+SAMPLES = [100000, 1000000, 10000000]
+
+# Tolerance of the iteration used as the exact PageRank values
+EXACT = 1e-12
+
+# Tolerance the solvers are compared at
+TIGHT = 1e-8
+
+
+def measured(function, *args, **kwargs):
+    """
+    Returns the result of calling `function`, the seconds it took, and
+    the peak memory in bytes it allocated, measured on a second call.
+    Only the timed call is given any `report`, so it records one call's
+    iterations.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    kwargs.pop("report", None)
+    tracemalloc.start()
+    function(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def l1_error(ranks, exact):
+    """Returns the L1 distance between two sets of PageRank values."""
+    return sum(abs(ranks[page] - exact[page]) for page in exact)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    corpora = []
+    for pages in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            write_corpus(generate(pages, CLUSTERS), directory)
+            corpus = crawl(directory)
+        corpora.append((pages, corpus,
+                        iterate_pagerank(corpus, DAMPING, tolerance=EXACT)))
+
+    print(f"{'pages':>8}{'method':>18}{'iterations':>12}{'seconds':>10}"
+          f"{'memory':>10}{'L1 error':>11}")
+    for pages, corpus, exact in corpora:
+        report = ConvergenceReport()
+        ranks, elapsed, peak = measured(
+            iterate_pagerank, corpus, DAMPING, report=report
+        )
+        print(f"{pages:>8}{'iterate':>18}{report.iterations:>12}"
+              f"{elapsed:>10.3f}{peak / 2 ** 20:>8.1f}MB"
+              f"{l1_error(ranks, exact):>11.2e}")
+
+        for samples in SAMPLES:
+            ranks, elapsed, peak = measured(
+                sample_pagerank, corpus, DAMPING, samples, seed=0
+            )
+            print(f"{pages:>8}{f'sample({samples:.0e})':>18}{'-':>12}"
+                  f"{elapsed:>10.3f}{peak / 2 ** 20:>8.1f}MB"
+                  f"{l1_error(ranks, exact):>11.2e}")
+
+    print()
+    print(f"solvers at tolerance {TIGHT:g}")
+    print(f"{'pages':>8}{'solver':>14}{'iterations':>12}{'seconds':>10}"
+          f"{'L1 error':>11}")
+    for pages, corpus, exact in corpora:
+        for solver in SOLVERS:
+            report = ConvergenceReport()
+            ranks = iterate_pagerank(corpus, DAMPING, tolerance=TIGHT,
+                                     report=report, solver=solver)
+            print(f"{pages:>8}{solver:>14}{report.iterations:>12}"
+                  f"{report.seconds:>10.3f}"
+                  f"{l1_error(ranks, exact):>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
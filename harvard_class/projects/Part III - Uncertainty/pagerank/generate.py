@@ -0,0 +1,118 @@
+import os
+import sys
+
+import numpy as np
+
+# Exponent of the power laws that pages' numbers of links, and how often
+# pages are linked to, follow
+EXPONENT = 2.1
+
+# Fraction of pages with no links
+DANGLING = 0.1
+
+# Most links on any one page
+MAX_LINKS = 100
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+    <head>
+        <title>{name}</title>
+    </head>
+    <body>
+        <h1>{name}</h1>
+
+        <div>Links:</div>
+        <ul>
+{links}        </ul>
+    </body>
+</html>
+"""
+
+LINK = """            <li><a href="{page}">{name}</a></li>
+"""
+
+
+def main():
+
+    # Check usage
+    if len(sys.argv) not in [3, 4, 5, 6]:
+        sys.exit("Usage: python generate.py directory pages "
+                 "[clusters [dangling [seed]]]")
+
+    directory = sys.argv[1]
+    pages = int(sys.argv[2])
+    clusters = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    dangling = float(sys.argv[4]) if len(sys.argv) > 4 else DANGLING
+    seed = int(sys.argv[5]) if len(sys.argv) > 5 else 0
+    if not 1 <= clusters <= pages:
+        sys.exit("Number of clusters must be between 1 and number of pages")
+
+    corpus = generate(pages, clusters, dangling, seed)
+    write_corpus(corpus, directory)
+    links = sum(len(links) for links in corpus.values())
+    print(f"Wrote {pages} pages with {links} links to {directory}")
+
+
+def generate(pages, clusters=1, dangling=DANGLING, seed=0):
+    """
+    Returns a random corpus of `pages` pages, named 0.html, 1.html, ...,
+    in the form crawl() returns.
+
+    The pages are split into `clusters` groups of nearly equal size that
+    never link to each other. A `dangling` fraction of the pages have no
+    links. The others' numbers of links follow a power law, and so do
+    the numbers of links to each page, since every page has a popularity
+    drawn from a power law and links go to pages in its cluster in
+    proportion to their popularity.
+
+    Raises ValueError unless 1 <= clusters <= pages, so that no cluster is
+    empty.
+    """
+    if not 1 <= clusters <= pages:
+        raise ValueError(f"cannot split {pages} pages into {clusters} "
+                         "clusters")
+    rng = np.random.default_rng(seed)
+    names = [f"{i}.html" for i in range(pages)]
+
+    degrees = np.minimum(rng.zipf(EXPONENT, size=pages), MAX_LINKS)
+    degrees[rng.random(pages) < dangling] = 0
+    popularity = rng.zipf(EXPONENT, size=pages).astype(float)
+
+    corpus = dict()
+    bounds = np.linspace(0, pages, clusters + 1).astype(int)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+
+        # Draw every link in the cluster at once by inverting the
+        # cumulative popularity of its pages
+        cumulative = np.cumsum(popularity[start:end])
+        counts = degrees[start:end]
+        targets = start + np.searchsorted(
+            cumulative, rng.random(counts.sum()) * cumulative[-1],
+            side="right"
+        )
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        for i in range(start, end):
+            links = targets[offsets[i - start]:offsets[i - start + 1]]
+            corpus[names[i]] = set(names[j] for j in links.tolist())
+            corpus[names[i]].discard(names[i])
+
+    return corpus
+
+
+def write_corpus(corpus, directory):
+    """
+    Writes each page of a corpus to `directory` as an HTML file with a
+    link to each of the pages it links to.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for page, links in corpus.items():
+        name = page[:-len(".html")]
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(PAGE.format(name=name, links="".join(
+                LINK.format(page=link, name=link[:-len(".html")])
+                for link in sorted(links)
+            )))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,339 @@
+import collections
+import functools
+import heapq
+import itertools
+import json
+import math
+import multiprocessing
 import os
 import random
 import re
 import sys
+import time
+
+import numpy as np
 
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Total change in PageRank values (L1 distance between successive
+# iterations) below which iterate_pagerank stops
+TOLERANCE = 0.0001
+
+# Most iterations iterate_pagerank will run before giving up
+MAX_ITERATIONS = 1000
+
+# Blocks of pages the Gauss-Seidel solver updates in turn
+GAUSS_SEIDEL_BLOCKS = 64
+
+# Iterations between extrapolations in the extrapolating solvers
+EXTRAPOLATION_PERIOD = 10
+
+# Share of the pages still being updated that must have settled before the
+# adaptive solver freezes them, so the links are not gathered every sweep
+ADAPTIVE_BATCH = 0.1
+
+# Random surfers sample_pagerank moves in lock-step
+WALKERS = 10000
+
+# Steps each surfer takes before the pages it is on count as samples, after
+# which where it started hardly matters (0.85 ** 50 < 0.0003)
+BURN_IN = 50
+
+# Share of the work of recomputing PageRank, counted in pages and links
+# visited, that update_pagerank may spend pushing before it falls back to
+# iterate_pagerank
+PUSH_BUDGET = 0.25
+
+# Residual per link below which personalized_pagerank stops pushing a
+# page's probability on to the pages it links to
+EPSILON = 0.00001
+
+# Characters of an HTML file read at a time while extracting its links
+CHUNK_SIZE = 65536
+
+# Link in an HTML tag
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Changed pages crawl must find before parsing them in a process pool
+PARALLEL_PAGES = 64
+
+# Files in an edge directory written by write_edges: page names, one per
+# line, and NumPy arrays of each page's number of links and of the links
+PAGES_FILE = "pages.txt"
+DEGREES_FILE = "degrees.npy"
+EDGES_FILE = "edges.npy"
+
+# Each link's source and target page, as indices into the page names
+EDGE = np.dtype([("target", "<u4"), ("source", "<u4")])
+
+# Links read from an edge file at a time
+EDGE_BLOCK = 1 << 22
+
 
 def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python pagerank.py corpus")
+    if os.path.exists(os.path.join(sys.argv[1], EDGES_FILE)):
+        report = ConvergenceReport()
+        ranks = iterate_pagerank_file(sys.argv[1], DAMPING, report=report)
+        print(f"PageRank Results from Iteration")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        print(report)
+        return
     corpus = crawl(sys.argv[1])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    report = ConvergenceReport()
+    ranks = iterate_pagerank(corpus, DAMPING, report=report)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
+    print(report)
+
+
+class LinkGraph():
+    """
+    A corpus's links stored as a compressed sparse row (CSR) matrix, with
+    one row per page listing the pages it links to. Row i's links are
+    targets[offsets[i]:offsets[i + 1]], as indices into `pages`.
+    """
+
+    def __init__(self, corpus):
+        self.pages = sorted(corpus)
+        self.index = {page: i for i, page in enumerate(self.pages)}
+
+        # Number of links out of each page, and where each row starts
+        self.degrees = np.fromiter(
+            (len(corpus[page]) for page in self.pages),
+            dtype=np.int64, count=len(self.pages)
+        )
+        self.offsets = np.zeros(len(self.pages) + 1, dtype=np.int64)
+        np.cumsum(self.degrees, out=self.offsets[1:])
+
+        # Page each link points to, and the page it comes from
+        self.targets = np.fromiter(
+            (self.index[link] for page in self.pages for link in corpus[page]),
+            dtype=np.int64, count=self.offsets[-1]
+        )
+        self.sources = np.repeat(
+            np.arange(len(self.pages), dtype=np.int64), self.degrees
+        )
+
+        # Sort each row, so the graph doesn't depend on set iteration order
+        self.targets = self.targets[np.lexsort((self.targets, self.sources))]
+
+        # Pages with no links are treated as linking to every page
+        self.dangling = self.degrees == 0
+
+    def __len__(self):
+        return len(self.pages)
+
+    def step(self, ranks, damping_factor):
+        """
+        Returns the distribution over pages after one more step of the
+        random surfer, given the distribution `ranks` over where they are.
+        """
+        n = len(self.pages)
+        shares = np.divide(ranks, self.degrees, out=np.zeros(n),
+                           where=~self.dangling)
+        linked = np.bincount(self.targets, weights=shares[self.sources],
+                             minlength=n)
+        spread = (1 - damping_factor + damping_factor
+                  * ranks[self.dangling].sum()) / n
+        return spread + damping_factor * linked
+
+    @functools.cached_property
+    def incoming(self):
+        """
+        The links sorted by target, as CSR rows of the links into each
+        page: (offsets, sources, targets), where the links into page i are
+        those from offsets[i] to offsets[i + 1].
+        """
+        order = np.argsort(self.targets, kind="stable")
+        offsets = np.zeros(len(self.pages) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.targets, minlength=len(self.pages)),
+                  out=offsets[1:])
+        return offsets, self.sources[order], self.targets[order]
+
+    def ranks(self, values):
+        """
+        Returns a dictionary mapping each page to its entry in `values`.
+        """
+        return dict(zip(self.pages, values.tolist()))
+
 
+class EdgeFile():
+    """
+    A link graph written to disk by write_edges. The links are sorted by
+    target page and memory-mapped, and read EDGE_BLOCK at a time, so only
+    vectors with one entry per page are ever held in memory.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, PAGES_FILE)) as f:
+            self.pages = f.read().splitlines()
+        self.degrees = np.load(os.path.join(directory, DEGREES_FILE))
+        self.edges = np.load(os.path.join(directory, EDGES_FILE),
+                             mmap_mode="r")
+
+        # Pages with no links are treated as linking to every page
+        self.dangling = self.degrees == 0
+
+    def __len__(self):
+        return len(self.pages)
+
+    def step(self, ranks, damping_factor):
+        """
+        Returns the distribution over pages after one more step of the
+        random surfer, given the distribution `ranks` over where they are.
+        """
+        n = len(self.pages)
+        shares = np.divide(ranks, self.degrees, out=np.zeros(n),
+                           where=~self.dangling)
 
-def crawl(directory):
+        # Each block's links point to a contiguous run of pages, since
+        # the links are sorted by target
+        linked = np.zeros(n)
+        for start in range(0, len(self.edges), EDGE_BLOCK):
+            block = self.edges[start:start + EDGE_BLOCK]
+            first = int(block["target"][0])
+            last = int(block["target"][-1])
+            linked[first:last + 1] += np.bincount(
+                block["target"] - first,
+                weights=shares[block["source"]],
+                minlength=last - first + 1
+            )
+
+        spread = (1 - damping_factor + damping_factor
+                  * ranks[self.dangling].sum()) / n
+        return spread + damping_factor * linked
+
+    def ranks(self, values):
+        """
+        Returns a dictionary mapping each page to its entry in `values`.
+        """
+        return dict(zip(self.pages, values.tolist()))
+
+
+class ConvergenceReport():
+    """
+    Record of an iterative PageRank computation: the solver used, the L1
+    distance between successive PageRank vectors after each iteration,
+    whether the last of them fell below the tolerance, and the seconds
+    the solver took. A computation that hands over to another solver part
+    way keeps the earlier phases in `phases`, as (solver, residuals,
+    seconds) tuples.
+    """
+
+    def __init__(self):
+        self.solver = None
+        self.residuals = []
+        self.converged = False
+        self.seconds = None
+        self.phases = []
+
+    @property
+    def iterations(self):
+        return len(self.residuals)
+
+    def record(self, residual, tolerance):
+        """
+        Records one iteration's residual, and returns whether it converged.
+        """
+        self.residuals.append(residual)
+        self.converged = residual < tolerance
+        return self.converged
+
+    def restart(self):
+        """
+        Moves the phase recorded so far into `phases`, and starts recording
+        a new one.
+        """
+        self.phases.append((self.solver, self.residuals, self.seconds))
+        self.solver = None
+        self.residuals = []
+        self.converged = False
+        self.seconds = None
+
+    def __str__(self):
+        status = "Converged" if self.converged else "Did not converge"
+        residual = self.residuals[-1] if self.residuals else float("nan")
+        details = [f"residual {residual:.2e}"]
+        if self.solver is not None:
+            details.insert(0, self.solver)
+        if self.seconds is not None:
+            details.append(f"{self.seconds:.3f}s")
+        for solver, residuals, _ in self.phases:
+            details.append(f"after {len(residuals)} {solver} iterations")
+        return (f"{status} after {self.iterations} iterations "
+                f"({', '.join(details)})")
+
+
+def crawl(directory, cache=None, processes=None, changes=None):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
+
+    If `cache` is the path of a link cache file, pages whose modification
+    time and size match the cache's record are not parsed again, and the
+    cache is rewritten with the corpus's current links. Once at least
+    PARALLEL_PAGES pages need parsing, they are split across a pool of
+    `processes` worker processes (by default, one per CPU).
+
+    If `changes` is a set, the pages whose links may differ from the
+    cache's are added to it: pages that were parsed again or removed, and
+    pages linking to a page that was added or removed.
     """
     pages = dict()
 
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+    # Find the HTML files, and the ones whose cached links are out of date
+    files = {
+        entry.name: entry.stat()
+        for entry in os.scandir(directory)
+        if entry.name.endswith(".html")
+    }
+    cached = load_link_cache(cache) if cache is not None else dict()
+    previous = set(cached)
+    stale = [
+        filename for filename, stat in files.items()
+        if cached.get(filename, [None, None])[:2]
+        != [stat.st_mtime_ns, stat.st_size]
+    ]
+
+    # Extract all links from the changed HTML files
+    paths = [os.path.join(directory, filename) for filename in stale]
+    if len(paths) >= PARALLEL_PAGES and processes != 1:
+        with multiprocessing.Pool(processes) as pool:
+            parsed = pool.map(parse_links, paths,
+                              chunksize=max(1, len(paths) // 64))
+    else:
+        parsed = map(parse_links, paths)
+    for filename, links in zip(stale, parsed):
+        stat = files[filename]
+        cached[filename] = [stat.st_mtime_ns, stat.st_size, sorted(links)]
+
+    # Record which pages' links in the corpus may have changed
+    if changes is not None:
+        removed = previous - files.keys()
+        added_or_removed = removed | (files.keys() - previous)
+        changes.update(stale, removed)
+        if added_or_removed:
+            changes.update(
+                filename for filename in files
+                if not added_or_removed.isdisjoint(cached[filename][2])
+            )
+
+    for filename in files:
+        pages[filename] = set(cached[filename][2]) - {filename}
+    if cache is not None:
+        save_link_cache(cache, {
+            filename: cached[filename] for filename in files
+        })
 
     # Only include links to other pages in the corpus
     for filename in pages:
@@ -48,6 +345,49 @@ def crawl(directory):
     return pages
 
 
+def parse_links(path):
+    """
+    Returns the set of links in the HTML file at `path`, which is read
+    CHUNK_SIZE characters at a time rather than all at once. A tag that
+    a chunk cuts off is carried over to be matched with the next chunk.
+    """
+    links = set()
+    pending = ""
+    with open(path) as f:
+        for chunk in iter(functools.partial(f.read, CHUNK_SIZE), ""):
+            pending += chunk
+            cut = pending.rfind("<")
+            if cut < pending.rfind(">"):
+                cut = len(pending)
+            links.update(LINK.findall(pending, 0, cut))
+            pending = pending[cut:]
+    links.update(LINK.findall(pending))
+    return links
+
+
+def load_link_cache(path):
+    """
+    Returns the link cache stored at `path`, mapping each filename to its
+    modification time in nanoseconds, its size and its sorted links, or
+    an empty cache if there is no readable cache file.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict()
+
+
+def save_link_cache(path, cached):
+    """
+    Writes a link cache to `path`, replacing any previous cache only once
+    the new one is completely written.
+    """
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(cached, f)
+    os.replace(f"{path}.tmp", path)
+
+
 def transition_model(corpus, page, damping_factor):
     """
     Return a probability distribution over which page to visit next,
@@ -57,10 +397,19 @@ def transition_model(corpus, page, damping_factor):
     linked to by `page`. With probability `1 - damping_factor`, choose
     a link at random chosen from all pages in the corpus.
     """
-    raise NotImplementedError
+    links = corpus[page]
+    if not links:
+        return {other: 1 / len(corpus) for other in corpus}
 
+    distribution = dict()
+    for other in corpus:
+        distribution[other] = (1 - damping_factor) / len(corpus)
+        if other in links:
+            distribution[other] += damping_factor / len(links)
+    return distribution
 
-def sample_pagerank(corpus, damping_factor, n):
+
+def sample_pagerank(corpus, damping_factor, n, walkers=WALKERS, seed=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
@@ -68,11 +417,49 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    Rather than one surfer, up to `walkers` independent surfers start on
+    random pages and move in lock-step, so each step is a few array
+    operations no matter how many surfers there are. After BURN_IN steps,
+    every page a surfer is on counts as one sample, until `n` have been
+    taken. The surfers' moves are drawn from a generator seeded with
+    `seed`, or from Python's random module if no seed is given.
     """
-    raise NotImplementedError
+    graph = LinkGraph(corpus)
+    if seed is None:
+        seed = random.getrandbits(64)
+    rng = np.random.default_rng(seed)
+
+    walkers = max(1, min(walkers, n))
+    positions = rng.integers(len(graph), size=walkers)
+    visits = np.zeros(len(graph), dtype=np.int64)
+    taken = 0
+    for step in itertools.count():
+        if step >= BURN_IN:
+            counted = positions[:n - taken]
+            visits += np.bincount(counted, minlength=len(graph))
+            taken += len(counted)
+            if taken == n:
+                break
 
+        # Surfers follow a link if the damping coin comes up and their
+        # page has any, choosing uniformly among its row of the graph, and
+        # otherwise move to a random page
+        current = positions
+        degrees = graph.degrees[current]
+        follow = (rng.random(walkers) < damping_factor) & (degrees > 0)
+        positions = rng.integers(len(graph), size=walkers)
+        picks = rng.random(np.count_nonzero(follow)) * degrees[follow]
+        positions[follow] = graph.targets[
+            graph.offsets[current[follow]] + picks.astype(np.int64)
+        ]
 
-def iterate_pagerank(corpus, damping_factor):
+    return graph.ranks(visits / taken)
+
+
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE,
+                     max_iterations=MAX_ITERATIONS, report=None,
+                     initial=None, solver="power"):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -80,8 +467,532 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    Iteration runs over the corpus's LinkGraph with one of the SOLVERS,
+    power iteration by default, and stops once the L1 distance between
+    successive PageRank vectors is below `tolerance`, or after
+    `max_iterations`. If `report` is given, it is a ConvergenceReport that
+    records the solver, each iteration's residual and the time taken.
+    Iteration starts from the PageRank values in `initial` if given (pages
+    missing from it start at 0), and from 1 / N for every page otherwise.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver: {solver}")
+    graph = LinkGraph(corpus)
+    return graph.ranks(run_solver(solver, graph, damping_factor, tolerance,
+                                  max_iterations, report, initial))
+
+
+def iterate_pagerank_file(directory, damping_factor, tolerance=TOLERANCE,
+                          max_iterations=MAX_ITERATIONS, report=None,
+                          initial=None):
+    """
+    Return PageRank values for each page of the link graph that
+    write_edges wrote to `directory`, as iterate_pagerank does for a
+    corpus, but streaming the links from disk during every iteration.
+    """
+    graph = EdgeFile(directory)
+    return graph.ranks(run_solver("power", graph, damping_factor, tolerance,
+                                  max_iterations, report, initial))
+
+
+def run_solver(solver, graph, damping_factor, tolerance, max_iterations,
+               report=None, initial=None):
+    """
+    Runs the solver named `solver` in SOLVERS on a LinkGraph or EdgeFile,
+    recording its name and the seconds it took in `report` if given, and
+    returns the PageRank vector it finds.
+    """
+    if report is None:
+        report = ConvergenceReport()
+    start = time.perf_counter()
+    ranks = SOLVERS[solver](graph, damping_factor, tolerance, max_iterations,
+                            report, initial)
+    report.solver = solver
+    report.seconds = time.perf_counter() - start
+    return ranks
+
+
+def power_iteration(graph, damping_factor, tolerance, max_iterations,
+                    report=None, initial=None):
+    """
+    Steps a LinkGraph or EdgeFile's random surfer distribution until the
+    L1 distance between successive distributions is below `tolerance`,
+    or for `max_iterations` steps, and returns the final distribution.
     """
-    raise NotImplementedError
+    if report is None:
+        report = ConvergenceReport()
+
+    ranks = starting_ranks(graph, initial)
+    while report.iterations < max_iterations:
+        updated = graph.step(ranks, damping_factor)
+        residual = np.abs(updated - ranks).sum()
+        ranks = updated
+        if report.record(residual, tolerance):
+            break
+
+    return ranks / ranks.sum()
+
+
+def gauss_seidel(graph, damping_factor, tolerance, max_iterations,
+                 report=None, initial=None):
+    """
+    Solves for a LinkGraph's PageRank values like power_iteration, but
+    updates GAUSS_SEIDEL_BLOCKS blocks of pages in turn, in place, so each
+    block already uses the values of the blocks before it in the same
+    sweep. Each sweep counts as one iteration.
+    """
+    if report is None:
+        report = ConvergenceReport()
+
+    n = len(graph)
+    offsets, sources, targets = graph.incoming
+    linked = ~graph.dangling
+    ranks = starting_ranks(graph, initial)
+    shares = np.divide(ranks, graph.degrees, out=np.zeros(n), where=linked)
+    dangling = ranks[graph.dangling].sum()
+    bounds = np.linspace(0, n, min(GAUSS_SEIDEL_BLOCKS, n) + 1).astype(int)
+
+    while report.iterations < max_iterations:
+        residual = 0
+        for first, end in zip(bounds[:-1], bounds[1:]):
+            links = slice(offsets[first], offsets[end])
+            incoming = np.bincount(targets[links] - first,
+                                   weights=shares[sources[links]],
+                                   minlength=end - first)
+            updated = (1 - damping_factor + damping_factor * dangling) / n
+            updated = updated + damping_factor * incoming
+
+            change = updated - ranks[first:end]
+            residual += np.abs(change).sum()
+            dangling += change[graph.dangling[first:end]].sum()
+            ranks[first:end] = updated
+            np.divide(updated, graph.degrees[first:end],
+                      out=shares[first:end], where=linked[first:end])
+        if report.record(residual, tolerance):
+            break
+
+    return ranks / ranks.sum()
+
+
+def quadratic_iteration(graph, damping_factor, tolerance, max_iterations,
+                        report=None, initial=None):
+    """
+    Power iteration that tries replacing the iterate with a quadratic
+    extrapolation from the last four, as extrapolated_iteration does
+    (Kamvar et al., "Extrapolation Methods for Accelerating PageRank
+    Computations").
+    """
+    return extrapolated_iteration(graph, damping_factor, tolerance,
+                                  max_iterations, report, initial,
+                                  quadratic_extrapolation, 4)
+
+
+def aitken_iteration(graph, damping_factor, tolerance, max_iterations,
+                     report=None, initial=None):
+    """
+    Power iteration that tries replacing the iterate with each page's
+    Aitken delta-squared extrapolation from the last three, as
+    extrapolated_iteration does.
+
+    This is not an acceleration on the corpora generate.py writes: their
+    errors are not dominated by one geometric term per page, so every try
+    is rejected, and it takes a few more iterations than power_iteration.
+    """
+    return extrapolated_iteration(graph, damping_factor, tolerance,
+                                  max_iterations, report, initial,
+                                  aitken_extrapolation, 3)
+
+
+def extrapolated_iteration(graph, damping_factor, tolerance, max_iterations,
+                           report, initial, extrapolate, history):
+    """
+    Power iteration that every so often tries `extrapolate`, called on the
+    last `history` iterates, oldest first, in place of the current iterate.
+    The extrapolation is kept only if the step after it changes the values
+    by less than the next power step would, going by how fast the residuals
+    have been falling. Otherwise iteration goes back to the current iterate,
+    the wasted step still counts as an iteration, and the wait before the
+    next try, which starts at EXTRAPOLATION_PERIOD iterations, doubles.
+    """
+    if report is None:
+        report = ConvergenceReport()
+
+    ranks = starting_ranks(graph, initial)
+    iterates = [ranks]
+    period = EXTRAPOLATION_PERIOD
+    due = period
+    trial = None
+    while report.iterations < max_iterations:
+        updated = graph.step(ranks, damping_factor)
+        residual = np.abs(updated - ranks).sum()
+        if trial is not None:
+            expected, previous = trial
+            trial = None
+            if residual >= expected:
+                report.record(residual, tolerance)
+                ranks, iterates = previous[-1], previous
+                period *= 2
+                due = report.iterations + period
+                continue
+            period = EXTRAPOLATION_PERIOD
+        ranks = updated
+        if report.record(residual, tolerance):
+            break
+        iterates = iterates[1 - history:] + [ranks]
+        if report.iterations >= due and len(iterates) == history:
+            due = report.iterations + period
+            extrapolated = extrapolate(*iterates)
+            if extrapolated is not None:
+                residuals = report.residuals
+                trial = (residuals[-1] ** 2 / residuals[-2], iterates)
+                ranks = extrapolated
+                iterates = [ranks]
+
+    return ranks / ranks.sum()
+
+
+def adaptive_iteration(graph, damping_factor, tolerance, max_iterations,
+                       report=None, initial=None):
+    """
+    Power iteration that stops updating pages once their values change by
+    less than `tolerance * (1 - damping_factor) / N` in each of two
+    iterations in a row, and drops the links into them from later
+    iterations (Kamvar et al., "Adaptive Methods for the Computation of
+    PageRank"). Pages are frozen
+    once at least ADAPTIVE_BATCH of those still being updated have settled,
+    and keep passing on their final values. Once the pages still being
+    updated converge, every page is updated again, and if that hasn't
+    converged too, no more pages are frozen.
+
+    This is not an acceleration on the corpora generate.py writes: pages
+    only settle in the last few iterations, so it runs at about the speed
+    of power_iteration, and can take an iteration or two more.
+    """
+    if report is None:
+        report = ConvergenceReport()
+
+    n = len(graph)
+    all_sources, all_targets = graph.sources, graph.targets
+    ranks = starting_ranks(graph, initial)
+    shares = np.divide(ranks, graph.degrees, out=np.zeros(n),
+                       where=~graph.dangling)
+    dangling = ranks[graph.dangling].sum()
+    threshold = tolerance * (1 - damping_factor) / n
+    freezing = True
+    frozen = np.zeros(n, dtype=bool)
+
+    while report.iterations < max_iterations:
+
+        # Gather what the pages still being updated need, with the links
+        # into them numbered by their target's position among those pages
+        if frozen.any():
+            active = np.flatnonzero(~frozen)
+            keep = ~frozen[all_targets]
+            sources = all_sources[keep]
+            position = np.cumsum(~frozen) - 1
+            targets = position[all_targets[keep]]
+        else:
+            active = slice(None)
+            sources, targets = all_sources, all_targets
+        degrees = graph.degrees[active]
+        pages = len(degrees)
+        inverse = np.divide(1, degrees, out=np.zeros(pages),
+                            where=degrees > 0)
+        ends = np.flatnonzero(degrees == 0)
+        calm = np.zeros(pages, dtype=bool)
+
+        while report.iterations < max_iterations:
+            updated = damping_factor * np.bincount(
+                targets, weights=shares[sources], minlength=pages
+            )
+            updated += (1 - damping_factor + damping_factor * dangling) / n
+
+            change = updated - ranks[active]
+            dangling += change[ends].sum()
+            ranks[active] = updated
+            shares[active] = updated * inverse
+            size = np.abs(change)
+            if report.record(size.sum(), tolerance):
+                break
+            if freezing:
+
+                # A page only counts as settled after two calm iterations
+                # in a row, since one can pass through a turning point
+                settled = calm & (size < threshold)
+                calm = size < threshold
+                if np.count_nonzero(settled) >= ADAPTIVE_BATCH * pages:
+                    frozen[np.arange(n)[active][settled]] = True
+                    break
+
+        if report.converged:
+            if pages == n:
+                break
+
+            # Update every page from now on, to bring the frozen ones up
+            # to date with the others
+            frozen[:] = False
+            freezing = False
+
+    return ranks / ranks.sum()
+
+
+# Solvers iterate_pagerank can use, by name
+SOLVERS = {
+    "power": power_iteration,
+    "gauss-seidel": gauss_seidel,
+    "quadratic": quadratic_iteration,
+    "aitken": aitken_iteration,
+    "adaptive": adaptive_iteration
+}
+
+
+def starting_ranks(graph, initial=None):
+    """
+    Returns the vector of PageRank values a solver starts from: the
+    values in `initial` for the graph's pages, rescaled to sum to 1, or
+    1 / N for every page.
+    """
+    if initial is not None:
+        start = np.array([initial.get(page, 0) for page in graph.pages],
+                         dtype=float)
+        if start.sum() > 0:
+            return start / start.sum()
+    return np.full(len(graph), 1 / len(graph))
+
+
+def quadratic_extrapolation(x0, x1, x2, x3):
+    """
+    Returns the quadratic extrapolation of four successive iterates,
+    which assumes the iteration matrix has only three eigenvectors and
+    cancels the two besides the PageRank vector.
+    """
+    y = np.stack([x1 - x0, x2 - x0], axis=1)
+    (g1, g2), *_ = np.linalg.lstsq(y, x0 - x3, rcond=None)
+    g3 = 1
+    return probability_vector((g1 + g2 + g3) * x1 + (g2 + g3) * x2 + g3 * x3)
+
+
+def aitken_extrapolation(x0, x1, x2):
+    """
+    Returns the Aitken delta-squared extrapolation of each entry of three
+    successive iterates, keeping the latest value of any entry whose
+    second difference is too small to divide by.
+    """
+    second = x2 - 2 * x1 + x0
+    usable = np.abs(second) > 1e-15
+    result = x2.copy()
+    result[usable] -= (x2 - x1)[usable] ** 2 / second[usable]
+    return probability_vector(result)
+
+
+def probability_vector(values):
+    """
+    Returns `values` with negative entries set to 0, rescaled to sum to 1,
+    or None if that isn't possible.
+    """
+    values = np.maximum(values, 0)
+    total = values.sum()
+    if not np.isfinite(total) or total <= 0:
+        return None
+    return values / total
+
+
+def write_edges(corpus, directory):
+    """
+    Writes a corpus's link graph to `directory` for iterate_pagerank_file:
+    the page names, each page's number of links, and the links themselves
+    as (target, source) pairs of page indices, sorted by target.
+    """
+    graph = LinkGraph(corpus)
+    if len(graph) >= 2 ** 32:
+        raise ValueError("too many pages for 32-bit page indices")
+    order = np.lexsort((graph.sources, graph.targets))
+    edges = np.empty(len(order), dtype=EDGE)
+    edges["target"] = graph.targets[order]
+    edges["source"] = graph.sources[order]
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, PAGES_FILE), "w") as f:
+        f.writelines(f"{page}\n" for page in graph.pages)
+    np.save(os.path.join(directory, DEGREES_FILE), graph.degrees)
+    np.save(os.path.join(directory, EDGES_FILE), edges)
+
+
+def update_pagerank(old_corpus, corpus, ranks, damping_factor, changed=None,
+                    tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                    report=None):
+    """
+    Return PageRank values for `corpus`, given the PageRank values `ranks`
+    previously computed for `old_corpus`, by only propagating the effect
+    of the pages whose links changed. `changed` holds the pages that were
+    added, removed or had their links changed, such as the set filled in
+    by crawl(); if it is None, the two corpora are compared to find them.
+
+    The old values are kept, and each changed page's old links take back
+    the rank they passed on while its new links receive it, which leaves
+    a residual on the pages they link to. Pages whose residual is above a
+    threshold add it to their own rank and push it on along their links,
+    round by round, until the residuals left bound the L1 error below
+    `tolerance`. If `report` is given, it records that bound after each
+    round, as the "push" solver.
+
+    Pushing costs about as much per page and link visited as a recompute,
+    which visits every page and link, so pushing may visit PUSH_BUDGET
+    times as many. Once it has, or once the rounds still needed at the
+    rate the bound is falling would take it over, the edits reach too much
+    of the corpus for pushing to pay off, and iterate_pagerank takes over
+    from the values so far, recorded in `report` as a new phase.
+
+    Pages without links spread their rank evenly over every page, and
+    N changes when pages are added or removed, but a change that is the
+    same for every page only scales the result, so it is never pushed and
+    the values are rescaled to sum to 1 at the end. Edits that move so
+    much rank that this rescaling would be unreliable fall back to
+    iterate_pagerank, starting from the old values.
+    """
+    if changed is None:
+        changed = set(
+            page for page in old_corpus.keys() | corpus.keys()
+            if old_corpus.get(page) != corpus.get(page)
+        )
+    if report is None:
+        report = ConvergenceReport()
+
+    # Start from the old values, with new pages at 0 but owed the rank
+    # every old page got from surfers moving to a page at random
+    values = dict(ranks)
+    residuals = dict()
+    for page in changed:
+        if page not in corpus:
+            values.pop(page, None)
+    added = [page for page in changed if page in corpus and page not in ranks]
+    if added:
+        dangling = sum(
+            ranks[page] for page in old_corpus if not old_corpus[page]
+        )
+        spread = (1 - damping_factor + damping_factor * dangling)
+        for page in added:
+            values[page] = 0
+            residuals[page] = spread / len(old_corpus)
+
+    # Move each changed page's rank from its old links to its new ones
+    for page in changed:
+        rank = ranks.get(page, 0)
+        for links, sign in [(old_corpus.get(page), -1),
+                            (corpus.get(page), 1)]:
+            if not links or not rank:
+                continue
+            share = sign * damping_factor * rank / len(links)
+            for link in links:
+                residuals[link] = residuals.get(link, 0) + share
+    for page in residuals.keys() - corpus.keys():
+        del residuals[page]
+
+    # The result is the pushed values scaled by their final total, which
+    # is already known, so fall back to full iteration if it is near 0
+    total = (sum(values.values())
+             + sum(residuals.values()) / (1 - damping_factor))
+    if abs(total) < 0.5:
+        return iterate_pagerank(corpus, damping_factor, tolerance,
+                                max_iterations, report, initial=ranks)
+
+    # Residual r left on the pages can change the result by at most
+    # sum(|r|) / (1 - damping_factor), and once no page's residual is above
+    # the threshold, that is below the tolerance
+    threshold = tolerance * (1 - damping_factor) / len(corpus)
+    error = sum(map(abs, residuals.values())) / (1 - damping_factor)
+    active = [page for page in residuals if abs(residuals[page]) > threshold]
+    budget = PUSH_BUDGET * (len(corpus) + sum(map(len, corpus.values())))
+    work = 0
+    report.solver = "push"
+    start = time.perf_counter()
+    while error >= tolerance and report.iterations < max_iterations:
+        queued = dict()
+        visited = len(residuals) + len(active)
+        for page in active:
+            residual = residuals.pop(page, 0)
+            values[page] += residual
+            links = corpus[page]
+            if not links:
+                continue
+            visited += len(links)
+            share = damping_factor * residual / len(links)
+            for link in links:
+                residuals[link] = residuals.get(link, 0) + share
+                if abs(residuals[link]) > threshold:
+                    queued[link] = True
+        work += visited
+        previous = error
+        error = sum(map(abs, residuals.values())) / (1 - damping_factor)
+        if report.record(error, tolerance):
+            break
+
+        # Project the work left from this round's, assuming the bound
+        # keeps falling at the same rate
+        rate = error / previous
+        rounds = (math.log(tolerance / error) / math.log(rate)
+                  if rate < 1 else math.inf)
+        if work + rounds * visited > budget:
+            report.seconds = time.perf_counter() - start
+            report.restart()
+            return iterate_pagerank(corpus, damping_factor, tolerance,
+                                    max_iterations, report, initial=values)
+        active = list(queued)
+    report.converged = error < tolerance
+    report.seconds = time.perf_counter() - start
+
+    total = sum(values.values())
+    return {page: value / total for page, value in values.items()}
+
+
+def personalized_pagerank(corpus, seeds, damping_factor, k=10,
+                          epsilon=EPSILON):
+    """
+    Return the `k` pages with the highest PageRank relative to `seeds`,
+    as a list of (page, value) pairs from highest to lowest value.
+
+    Relative PageRank is the PageRank of a surfer who, with probability
+    `1 - damping_factor` and whenever they reach a page with no links,
+    starts again from one of the seed pages chosen at random rather than
+    from any page in the corpus.
+
+    It is estimated by forward push: all probability starts as residual
+    on the seeds, and a page whose residual is at least `epsilon` times
+    its number of links keeps `1 - damping_factor` of it as its value and
+    passes the rest on along its links. Each push settles at least
+    `epsilon * (1 - damping_factor)` of the probability, so the work done
+    depends on `epsilon` and the pages near the seeds, not on the size of
+    the corpus. Values never exceed the true ones, and fall short of them
+    in total by the residual left unpushed, which is less than `epsilon`
+    per link on every page it is left on.
+    """
+    seeds = sorted(set(seeds))
+    values = dict()
+    residuals = {seed: 1 / len(seeds) for seed in seeds}
+    queue = collections.deque(seeds)
+    queued = set(seeds)
+
+    def add(page, amount):
+        residuals[page] = residuals.get(page, 0) + amount
+        if (page not in queued
+                and residuals[page] >= epsilon * max(len(corpus[page]), 1)):
+            queued.add(page)
+            queue.append(page)
+
+    while queue:
+        page = queue.popleft()
+        queued.discard(page)
+        residual = residuals.pop(page)
+        values[page] = values.get(page, 0) + (1 - damping_factor) * residual
+
+        # Surfers on pages with no links start again from the seeds
+        links = corpus[page] or seeds
+        share = damping_factor * residual / len(links)
+        for link in links:
+            add(link, share)
+
+    return heapq.nlargest(k, values.items(), key=lambda item: item[1])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from crossword import Crossword
+from generate import CrosswordCreator
+
+# Structures to solve
+STRUCTURES = ["data/structure1.txt", "data/structure2.txt"]
+
+# Dictionary the larger ones are built from
+WORDS = "data/words2.txt"
+
+# Numbers of words in the larger dictionaries
+SIZES = [10000, 100000]
+
+# Longest word in the larger dictionaries
+MAX_LENGTH = 15
+
+# Sizes of the open squares and lattices generated as hard grids
+SQUARES = [4, 5]
+LATTICES = [7, 9]
+
+
+def square(n):
+    """Returns the structure of an n x n grid with no blocked cells."""
+    return "\n".join("_" * n for _ in range(n))
+
+
+def lattice(n):
+    """
+    Returns the structure of an n x n grid, for odd n, whose even rows
+    and columns are words, crossing at every other cell.
+    """
+    return "\n".join(
+        "_" * n if i % 2 == 0 else "_#" * (n // 2) + "_"
+        for i in range(n)
+    )
+
+
+def dictionary(words, size, seed=0):
+    """
+    Returns a set of `size` words: `words`, and then words made of the
+    start of one of them and the end of another, which keeps the letters
+    of the dictionary in roughly their usual places.
+    """
+    rng = random.Random(seed)
+    words = sorted(words)
+    result = set(words)
+    while len(result) < size:
+        first, second = rng.sample(words, 2)
+        word = (first[:rng.randint(1, len(first))]
+                + second[rng.randint(0, len(second) - 1):])
+        if 2 <= len(word) <= MAX_LENGTH:
+            result.add(word)
+    return result
+
+
+def measured(function, *args):
+    """
+    Returns the result of calling `function`, the seconds it took, and
+    the peak memory in bytes it allocated.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def solve(structure, words_file, mac=True):
+    """
+    Solves a crossword, returning the creator, the seconds spent indexing
+    the words, enforcing arc consistency and searching, the peak memory in
+    bytes the search allocated, and whether it found a solution.
+    """
+    start = time.perf_counter()
+    creator = CrosswordCreator(Crossword(structure, words_file), mac=mac)
+    indexed = time.perf_counter()
+    creator.enforce_node_consistency()
+    creator.ac3()
+    consistent = time.perf_counter()
+    assignment, elapsed, peak = measured(creator.backtrack, dict())
+    if assignment is not None and not creator.consistent(assignment):
+        raise RuntimeError(f"inconsistent assignment for {structure}")
+    return (creator, indexed - start, consistent - indexed, elapsed, peak,
+            assignment is not None)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    with open(WORDS) as f:
+        words = set(f.read().upper().splitlines())
+
+    with tempfile.TemporaryDirectory() as directory:
+        dictionaries = [(len(words), WORDS)]
+        for size in sizes:
+            filename = os.path.join(directory, f"words{size}.txt")
+            with open(filename, "w") as f:
+                f.write("\n".join(sorted(dictionary(words, size))))
+            dictionaries.append((size, filename))
+
+        print(f"{'structure':>16}{'words':>8}{'index':>9}{'ac3':>9}"
+              f"{'search':>9}{'memory':>10}{'solved':>8}")
+        for structure in STRUCTURES:
+            for size, filename in dictionaries:
+                _, index, ac3, search, peak, solved = solve(
+                    structure, filename
+                )
+                print(f"{os.path.basename(structure):>16}{size:>8}"
+                      f"{index:>9.4f}{ac3:>9.4f}{search:>9.4f}"
+                      f"{peak / 2 ** 10:>8.1f}KB{str(solved):>8}")
+
+        grids = (
+            [(f"square {n}", square(n)) for n in SQUARES]
+            + [(f"lattice {n}", lattice(n)) for n in LATTICES]
+        )
+        print()
+        print("hard grids, forward checking against maintained arc "
+              "consistency")
+        print(f"{'grid':>16}{'words':>8}{'search':>9}{'nodes':>9}"
+              f"{'backtracks':>12}{'revisions':>11}{'solved':>8}")
+        for name, grid in grids:
+            structure = os.path.join(directory, "structure.txt")
+            with open(structure, "w") as f:
+                f.write(grid)
+            for size, filename in dictionaries:
+                for mac in [False, True]:
+                    creator, _, _, search, _, solved = solve(
+                        structure, filename, mac
+                    )
+                    label = f"{name} {'mac' if mac else 'fc'}"
+                    print(f"{label:>16}{size:>8}{search:>9.3f}"
+                          f"{creator.nodes:>9}{creator.backtracks:>12}"
+                          f"{creator.propagations:>11}{str(solved):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -35,6 +35,17 @@ class Variable():
         return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
 
 
+class Overlaps(dict):
+    """
+    Maps each ordered pair of overlapping variables (v1, v2) to (i, j),
+    where v1's ith character overlaps v2's jth character. Looking up a
+    pair that does not overlap gives None, without storing an entry.
+    """
+
+    def __missing__(self, key):
+        return None
+
+
 class Crossword():
 
     def __init__(self, structure_file, words_file):
@@ -104,30 +115,108 @@ class Crossword():
                             length=length
                         ))
 
+        # Index the variables passing through each cell, with the
+        # position of the cell in each variable
+        grid = dict()
+        for variable in self.variables:
+            for k, cell in enumerate(variable.cells):
+                grid.setdefault(cell, []).append((variable, k))
+
         # Compute overlaps for each word
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        # Only variables sharing a cell in the grid overlap, so only those
+        # pairs are stored
+        self.overlaps = Overlaps()
+        neighbors = {variable: set() for variable in self.variables}
+        for entries in grid.values():
+            for v1, i in entries:
+                for v2, j in entries:
+                    if v1 != v2:
+                        self.overlaps[v1, v2] = (i, j)
+                        neighbors[v1].add(v2)
+        self.neighbor_sets = {
+            variable: frozenset(others)
+            for variable, others in neighbors.items()
+        }
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        return self.neighbor_sets[var]
+
+
+class WordIndex():
+    """
+    Vocabulary indexed by word length, position and letter.
+
+    The words of each length are numbered in sorted order, so that any set
+    of words of one length can be stored as an integer bitset, with bit k
+    set if the kth word is in the set. `letters[length, position, letter]`
+    is the bitset of words of that length with that letter at that
+    position, which turns filtering a set of words by a letter into a
+    single intersection.
+    """
+
+    def __init__(self, words):
+        self.words = dict()
+        for word in sorted(words):
+            self.words.setdefault(len(word), []).append(word)
+        self.ids = {
+            word: k
+            for words in self.words.values()
+            for k, word in enumerate(words)
+        }
+
+        self.letters = dict()
+        self.alphabet = dict()
+        for length, words in self.words.items():
+            for position in range(length):
+                ids = dict()
+                for k, word in enumerate(words):
+                    ids.setdefault(word[position], []).append(k)
+                for letter, members in ids.items():
+                    self.letters[length, position, letter] = bitset(
+                        members, len(words)
+                    )
+                self.alphabet[length, position] = sorted(ids)
+
+    def all(self, length):
+        """Return the bitset of every word of a given length."""
+        return (1 << len(self.words.get(length, []))) - 1
+
+    def word(self, length, k):
+        """Return the kth word of a given length."""
+        return self.words[length][k]
+
+    def bit(self, word):
+        """Return the bitset holding only `word`."""
+        return 1 << self.ids[word]
+
+    def decode(self, length, bits):
+        """Return the list of words of a given length in a bitset."""
+        words = self.words.get(length, [])
+        return [
+            words[k]
+            for k, bit in enumerate(reversed(bin(bits)[2:]))
+            if bit == "1"
+        ]
+
+    def letters_in(self, length, position, bits):
+        """
+        Return the letters found at `position` in at least one of the words
+        of a given length in a bitset.
+        """
+        return [
+            letter
+            for letter in self.alphabet.get((length, position), [])
+            if bits & self.letters[length, position, letter]
+        ]
+
+
+def bitset(members, size):
+    """Return the integer with bit k set for each k in `members`."""
+    bits = bytearray((size + 7) // 8)
+    for k in members:
+        bits[k >> 3] |= 1 << (k & 7)
+    return int.from_bytes(bits, "little")
@@ -1,20 +1,40 @@
 import sys
 
+from collections import deque
+
 from crossword import *
 
 
 class CrosswordCreator():
 
-    def __init__(self, crossword):
+    def __init__(self, crossword, mac=True):
         """
         Create new CSP crossword generate.
+
+        If `mac` is True, arc consistency is maintained after every
+        assignment during the search; otherwise only the neighbors of the
+        assigned variable are checked against it.
         """
         self.crossword = crossword
+        self.mac = mac
+        self.index = WordIndex(self.crossword.words)
+
+        # Each domain is a bitset over the index's words of the variable's
+        # length, starting with all of them
         self.domains = {
-            var: self.crossword.words.copy()
+            var: self.index.all(var.length)
             for var in self.crossword.variables
         }
 
+        # Words removed from the domains, as (variable, bitset) pairs in
+        # the order they were removed, so that they can be put back
+        self.trail = []
+
+        # Assignments tried, assignments undone and arcs revised
+        self.nodes = 0
+        self.backtracks = 0
+        self.propagations = 0
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -99,7 +119,8 @@ class CrosswordCreator():
         (Remove any values that are inconsistent with a variable's unary
          constraints; in this case, the length of the word.)
         """
-        raise NotImplementedError
+        for var in self.domains:
+            self.domains[var] &= self.index.all(var.length)
 
     def revise(self, x, y):
         """
@@ -110,7 +131,18 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        raise NotImplementedError
+        overlap = self.crossword.overlaps[x, y]
+        if overlap is None:
+            return False
+        i, j = overlap
+        self.propagations += 1
+
+        # Words of x whose ith letter is the jth letter of some word of y
+        supported = 0
+        for letter in self.index.letters_in(y.length, j, self.domains[y]):
+            supported |= self.index.letters.get((x.length, i, letter), 0)
+
+        return self.remove(x, self.domains[x] & ~supported)
 
     def ac3(self, arcs=None):
         """
@@ -121,21 +153,107 @@ class CrosswordCreator():
         Return True if arc consistency is enforced and no domains are empty;
         return False if one or more domains end up empty.
         """
-        raise NotImplementedError
+        if arcs is None:
+            arcs = [
+                (x, y)
+                for x in self.crossword.variables
+                for y in self.crossword.neighbors(x)
+            ]
+        queue = deque(arcs)
+        queued = set(queue)
+        while queue:
+            x, y = queue.popleft()
+            queued.discard((x, y))
+            if self.revise(x, y):
+                if not self.domains[x]:
+                    return False
+                for z in self.crossword.neighbors(x):
+                    if z != y and (z, x) not in queued:
+                        queue.append((z, x))
+                        queued.add((z, x))
+        return True
+
+    def remove(self, var, bits):
+        """
+        Remove the words in bitset `bits` from the domain of `var`,
+        recording the removal on the trail.
+
+        Return True if any words were removed; return False otherwise.
+        """
+        bits &= self.domains[var]
+        if not bits:
+            return False
+        self.domains[var] ^= bits
+        self.trail.append((var, bits))
+        return True
+
+    def undo(self, mark):
+        """
+        Put back every word removed since the trail had length `mark`.
+        """
+        while len(self.trail) > mark:
+            var, bits = self.trail.pop()
+            self.domains[var] |= bits
+
+    def infer(self, var, word, assignment):
+        """
+        Reduce the domains to fit `var` being assigned `word`: the domain of
+        `var` becomes just `word`, and no other unassigned variable may take
+        `word`. With `self.mac`, AC-3 then runs from the arcs into every
+        variable whose domain changed; otherwise the domains of the
+        neighbors of `var` are revised against it.
+
+        Return False if a domain ends up empty; return True otherwise.
+        """
+        bit = self.index.bit(word)
+        self.remove(var, ~bit)
+        changed = [var]
+        for other in self.crossword.variables:
+            if other.length == var.length and other not in assignment:
+                if self.remove(other, bit):
+                    if not self.domains[other]:
+                        return False
+                    changed.append(other)
+
+        if self.mac:
+            return self.ac3([
+                (neighbor, y)
+                for y in changed
+                for neighbor in self.crossword.neighbors(y)
+                if neighbor not in assignment
+            ])
+
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor not in assignment:
+                self.revise(neighbor, var)
+                if not self.domains[neighbor]:
+                    return False
+        return True
 
     def assignment_complete(self, assignment):
         """
         Return True if `assignment` is complete (i.e., assigns a value to each
         crossword variable); return False otherwise.
         """
-        raise NotImplementedError
+        return all(var in assignment for var in self.crossword.variables)
 
     def consistent(self, assignment):
         """
         Return True if `assignment` is consistent (i.e., words fit in crossword
         puzzle without conflicting characters); return False otherwise.
         """
-        raise NotImplementedError
+        words = list(assignment.values())
+        if len(set(words)) != len(words):
+            return False
+        for var, word in assignment.items():
+            if len(word) != var.length:
+                return False
+            for neighbor in self.crossword.neighbors(var):
+                if neighbor in assignment:
+                    i, j = self.crossword.overlaps[var, neighbor]
+                    if word[i] != assignment[neighbor][j]:
+                        return False
+        return True
 
     def order_domain_values(self, var, assignment):
         """
@@ -144,7 +262,29 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
-        raise NotImplementedError
+        # For each unassigned neighbor, count its values with each letter
+        # at the overlap; a word for `var` rules out all the others
+        counts = []
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                continue
+            i, j = self.crossword.overlaps[var, neighbor]
+            domain = self.domains[neighbor]
+            counts.append((i, domain.bit_count(), {
+                letter: (
+                    domain & self.index.letters[neighbor.length, j, letter]
+                ).bit_count()
+                for letter in self.index.letters_in(neighbor.length, j, domain)
+            }))
+
+        def ruled_out(word):
+            return sum(
+                size - letters.get(word[i], 0)
+                for i, size, letters in counts
+            )
+
+        words = self.index.decode(var.length, self.domains[var])
+        return sorted(words, key=ruled_out)
 
     def select_unassigned_variable(self, assignment):
         """
@@ -154,7 +294,13 @@ class CrosswordCreator():
         degree. If there is a tie, any of the tied variables are acceptable
         return values.
         """
-        raise NotImplementedError
+        return min(
+            (var for var in self.crossword.variables if var not in assignment),
+            key=lambda var: (
+                self.domains[var].bit_count(),
+                -len(self.crossword.neighbors(var))
+            )
+        )
 
     def backtrack(self, assignment):
         """
@@ -164,8 +310,27 @@ class CrosswordCreator():
         `assignment` is a mapping from variables (keys) to words (values).
 
         If no assignment is possible, return None.
+
+        Each assignment is followed by inference on the domains, which is
+        undone from the trail if the assignment fails.
         """
-        raise NotImplementedError
+        if self.assignment_complete(assignment):
+            return assignment
+        var = self.select_unassigned_variable(assignment)
+        for word in self.order_domain_values(var, assignment):
+            self.nodes += 1
+            mark = len(self.trail)
+            assignment[var] = word
+            if self.consistent(assignment) and self.infer(
+                var, word, assignment
+            ):
+                result = self.backtrack(assignment)
+                if result is not None:
+                    return result
+            del assignment[var]
+            self.undo(mark)
+            self.backtracks += 1
+        return None
 
 
 def main():